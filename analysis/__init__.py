@@ -0,0 +1 @@
+# 数据分析核心模块：不依赖 Streamlit，可在页面和脚本中复用
@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis.cache import nbytes_of
+from analysis.instrument import Recorder, activate, deactivate
+
+
+class JobCancelled(Exception):
+    """任务被取消，由 Job.check / Job.report 在任务函数中抛出"""
+
+
+class Job:
+    """后台执行的一个任务。
+
+    任务函数的第一个参数是 Job 本身，通过 report 汇报进度和部分结果；
+    取消只是设置标记，任务函数在 report 或 check 时才会停下，正在进行的一次模型拟合不能中断。
+    subscribers 记录在任务结束前等待结果的各方（如会话编号），由 JobExecutor.cancel 使用；
+    spans 为任务执行期间记录的各段耗时（见 analysis.instrument），任务线程中没有页面的 Recorder，需要单独记录。
+    """
+
+    def __init__(self, name, key=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.key = key
+        self.status = 'pending'
+        self.progress = 0.0
+        self.message = ""
+        self.partial = {}
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.subscribers = set()
+        self.spans = []
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'error', 'cancelled')
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def seconds(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def report(self, progress=None, message=None, **partial):
+        """更新进度（0~1）、说明和部分结果；已请求取消时抛出 JobCancelled"""
+        if progress is not None:
+            self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        if partial:
+            # 整体替换，页面线程读到的总是一份完整的部分结果
+            self.partial = {**self.partial, **partial}
+        self.check()
+
+    def cancel(self):
+        self._cancel.set()
+        # 还在排队的任务直接取消
+        if self._future is not None and self._future.cancel():
+            self._finish('cancelled')
+
+    def _finish(self, status):
+        self.finished_at = time.time()
+        self.status = status
+
+
+class JobExecutor:
+    """在线程池中执行任务，所有会话共用。
+
+    相同 key 的任务只执行一次：正在执行的直接返回同一个任务，已完成的结果直接复用；
+    出错、被取消或已请求取消的任务再次提交时重新执行。最多保留 max_jobs 个已结束的任务，
+    给出 budget（analysis.store.MemoryBudget）时，已完成任务的结果计入全局内存预算，超出时丢弃整个任务。
+    """
+
+    def __init__(self, max_workers=None, max_jobs=64, budget=None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_jobs = max_jobs
+        self.budget = budget
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def submit(self, name, func, *args, key=None, subscriber=None, **kwargs):
+        """在后台执行 func(job, *args, **kwargs)，返回 Job。
+
+        subscriber 标识提交方，同一个任务被多方共用时，只有全部提交方都取消才真正取消。
+        """
+        with self._lock:
+            job = self._by_key.get(key) if key is not None else None
+            # 已请求取消但还在执行的任务，结果不会被使用
+            if job is None or job.status in ('error', 'cancelled') or (job.cancel_requested and not job.finished):
+                job = Job(name, key)
+                self._jobs[job.id] = job
+                if key is not None:
+                    self._by_key[key] = job
+                self._trim()
+                job._future = self._pool.submit(self._run, job, func, args, kwargs)
+            # 复用已完成任务的一方没有等待，不算订阅
+            if subscriber is not None and not job.finished:
+                job.subscribers.add(subscriber)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        if job.cancel_requested:
+            job._finish('cancelled')
+            return
+        job.started_at = time.time()
+        job.status = 'running'
+        # 线程池的线程中没有页面的 Recorder，任务内的各段（如 fit/ols）记在任务自己的 Recorder 中
+        recorder = Recorder(job=job.name)
+        token = activate(recorder)
+        try:
+            result = func(job, *args, **kwargs)
+            # 执行期间请求了取消的，结果不再使用
+            status = 'cancelled' if job.cancel_requested else 'done'
+        except JobCancelled:
+            status = 'cancelled'
+        except Exception as e:
+            job.error = e
+            status = 'error'
+        finally:
+            recorder.finish()
+            deactivate(token)
+        # 页面看到任务结束时，结果和记录都已经就绪
+        job.spans = recorder.spans
+        if status == 'done':
+            job.result = result
+            job.progress = 1.0
+        job._finish(status)
+        if status == 'done' and self.budget is not None:
+            self.budget.charge(('job', job.id), nbytes_of(result), lambda: self._forget(job))
+
+    def _trim(self):
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished[:max(0, len(finished) - self.max_jobs)]:
+            self._remove(job)
+
+    def _remove(self, job):
+        self._jobs.pop(job.id, None)
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+        if self.budget is not None:
+            self.budget.discard(('job', job.id))
+
+    def _forget(self, job):
+        # 被内存预算淘汰：之后按 key 提交时重新执行，已显示该任务的页面当作任务不存在
+        with self._lock:
+            self._remove(job)
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id, subscriber=None):
+        """取消任务；给出 subscriber 时只撤销这一方，还有其他提交方在等待结果的任务继续执行"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if subscriber is not None:
+                job.subscribers.discard(subscriber)
+                if job.subscribers:
+                    return job
+        job.cancel()
+        return job
+
+    def jobs(self):
+        """所有保留的任务，先提交的在前"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def shutdown(self, wait=True):
+        for job in self.jobs():
+            job.cancel()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
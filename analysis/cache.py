@@ -0,0 +1,122 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def nbytes_of(value, depth=4, _seen=None):
+    """估计缓存的值占用的内存（字节）。
+
+    DataFrame、Series 和数组直接计算；带整数 nbytes 属性的对象使用该属性；
+    其他对象（模型、拟合结果等）递归统计其属性、列表和字典中的数据，同一对象只计一次。
+    """
+    if _seen is None:
+        _seen = set()
+    if value is None or depth < 0 or id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes, int, float, bool)):
+        return 0
+    nbytes = getattr(type(value), 'nbytes', None) and getattr(value, 'nbytes', None)
+    if isinstance(nbytes, (int, np.integer)):
+        return int(nbytes)
+    if isinstance(value, dict):
+        items = value.values()
+    elif isinstance(value, (list, tuple, set)):
+        items = value
+    elif hasattr(value, '__dict__'):
+        items = vars(value).values()
+    else:
+        return 0
+    return sum(nbytes_of(item, depth - 1, _seen) for item in items)
+
+
+class LRUCache:
+    """按条目数限制大小的缓存，超出时淘汰最近最少使用的条目，可在多个线程间共享。
+
+    给出 budget（analysis.store.MemoryBudget）时，每个条目按 sizeof 估计的大小计入全局内存预算，
+    预算不足时也会被淘汰。
+    """
+
+    def __init__(self, max_items=64, budget=None, name=None, sizeof=nbytes_of):
+        self.max_items = max_items
+        self.budget = budget
+        self.name = name if name is not None else f"cache-{id(self)}"
+        self.sizeof = sizeof
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def _budget_key(self, key):
+        return ('cache', self.name, key)
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+        if value is not None and self.budget is not None:
+            self.budget.touch(self._budget_key(key))
+        return value
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.budget is not None else 0
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            evicted = []
+            while len(self._items) > self.max_items:
+                evicted.append(self._items.popitem(last=False)[0])
+        if self.budget is not None:
+            # 预算可能回调 _release 淘汰本缓存的条目，不能在持有锁时调用
+            for old_key in evicted:
+                self.budget.discard(self._budget_key(old_key))
+            self.budget.charge(self._budget_key(key), size, lambda: self._release(key, value))
+
+    def resize(self, key):
+        """条目在缓存后继续增长（如查询引擎按需建立的索引）时，重新计入预算"""
+        value = self.get(key)
+        if value is not None and self.budget is not None:
+            self.budget.charge(self._budget_key(key), self.sizeof(value), lambda: self._release(key, value))
+
+    def _release(self, key, value):
+        # 只淘汰登记时的那个值，期间被替换的新值保留
+        with self._lock:
+            if self._items.get(key) is value:
+                del self._items[key]
+
+    def get_or_create(self, key, create):
+        value = self.get(key)
+        if value is None:
+            value = create()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._items)
+            self._items.clear()
+        if self.budget is not None:
+            for key in keys:
+                self.budget.discard(self._budget_key(key))
+
+
+def frame_hash(df):
+    """数据内容的哈希，用于缓存键"""
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    # 加入行号权重，使行顺序不同的数据得到不同的结果
+    weights = np.arange(1, len(hashes) + 1, dtype=np.uint64)
+    return f"{len(df)}:{int((hashes * weights).sum())}:{','.join(map(str, df.columns))}"
@@ -0,0 +1,224 @@
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from analysis.instrument import traced
+
+
+PLOT_TYPES = ["散点图", "折线图", "饼图", "箱线图"]
+LINE_METHODS = ["LTTB", "最小/最大值"]
+
+# 超过该点数改用 WebGL 绘制
+WEBGL_THRESHOLD = 10_000
+# 折线图每条线最多发送的点数
+MAX_LINE_POINTS = 5_000
+# 散点图超过该点数时改为在服务端做二维分箱，只发送每个格子的计数
+DENSITY_THRESHOLD = 200_000
+# 散点图有颜色分类时无法画密度图，改为按类别分层抽样
+MAX_SCATTER_POINTS = 100_000
+DENSITY_BINS = 200
+# 饼图最多显示的类别数，其余合并为“其他”
+MAX_PIE_SLICES = 20
+
+
+def _as_float(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype('int64').to_numpy(dtype=float)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    # 非数值的 X 轴按顺序位置降采样
+    return np.arange(len(values), dtype=float)
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets 降采样，返回保留点的位置。x 需已排序"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # 首尾两点固定保留，中间的点分到 n_out - 2 个桶中
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一个桶的平均点，最后一个桶以终点代替
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(y, n_out):
+    """每个桶保留最小值和最大值两个点，返回保留点的位置（升序）"""
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_buckets < 1 or n <= n_out:
+        return np.arange(n)
+    buckets = np.arange(n) * n_buckets // n
+    series = pd.Series(y)
+    grouped = series.groupby(buckets)
+    keep = np.concatenate([grouped.idxmin().to_numpy(), grouped.idxmax().to_numpy()])
+    return np.unique(keep)
+
+
+def _decimate_line(df, x, y, method, max_points):
+    data = df[[x, y]].dropna()
+    data = data.sort_values(x, kind='stable')
+    if len(data) <= max_points:
+        return data
+    values = data[y].to_numpy(dtype=float)
+    if method == "LTTB":
+        keep = lttb(_as_float(data[x]), values, max_points)
+    else:
+        keep = minmax(values, max_points)
+    return data.iloc[keep]
+
+
+def _line(df, x, y, hue, method, max_points):
+    if hue is None:
+        data = _decimate_line(df, x, y, method, max_points)
+    else:
+        # 每条线分别降采样
+        parts = []
+        for value, group in df[[x, y, hue]].groupby(hue, sort=False):
+            part = _decimate_line(group, x, y, method, max_points)
+            part[hue] = value
+            parts.append(part)
+        data = pd.concat(parts) if parts else df[[x, y, hue]].iloc[:0]
+    render_mode = 'webgl' if len(data) > WEBGL_THRESHOLD else 'svg'
+    return px.line(data, x=x, y=y, color=hue, render_mode=render_mode), len(data), render_mode
+
+
+def _density(data, x, y):
+    counts, x_edges, y_edges = np.histogram2d(
+        data[x].to_numpy(dtype=float), data[y].to_numpy(dtype=float), bins=DENSITY_BINS)
+    # 空格子不着色
+    z = np.where(counts.T > 0, counts.T, np.nan)
+    fig = go.Figure(go.Heatmap(
+        z=z, x=(x_edges[:-1] + x_edges[1:]) / 2, y=(y_edges[:-1] + y_edges[1:]) / 2,
+        colorscale='Viridis', colorbar={'title': '点数'}))
+    fig.update_layout(xaxis_title=x, yaxis_title=y)
+    return fig, int((counts > 0).sum())
+
+
+def _scatter(df, x, y, hue):
+    columns = [x, y] if hue is None else [x, y, hue]
+    data = df[columns].dropna(subset=[x, y])
+    numeric = all(pd.api.types.is_numeric_dtype(data[c]) for c in (x, y))
+    if len(data) > DENSITY_THRESHOLD and hue is None and numeric:
+        fig, points = _density(data, x, y)
+        return fig, points, '密度聚合'
+    if len(data) > MAX_SCATTER_POINTS:
+        # 按颜色类别分层抽样，保留各类别的比例
+        frac = MAX_SCATTER_POINTS / len(data)
+        if hue is None:
+            data = data.sample(frac=frac, random_state=0)
+        else:
+            data = data.groupby(hue, group_keys=False, sort=False).sample(frac=frac, random_state=0)
+    render_mode = 'webgl' if len(data) > WEBGL_THRESHOLD else 'svg'
+    return px.scatter(data, x=x, y=y, color=hue, render_mode=render_mode), len(data), render_mode
+
+
+def _pie(df, names):
+    # 只发送每个类别的计数
+    counts = df[names].value_counts(dropna=False)
+    if len(counts) > MAX_PIE_SLICES:
+        others = counts.iloc[MAX_PIE_SLICES - 1:].sum()
+        counts = counts.iloc[:MAX_PIE_SLICES - 1]
+        counts = pd.concat([pd.Series(counts.to_numpy(), index=counts.index.astype(str)),
+                            pd.Series([others], index=["其他"])])
+    labels = counts.index.astype(str)
+    fig = px.pie(names=labels, values=counts.to_numpy(), title=f"{names} 分布")
+    return fig, len(counts), '聚合'
+
+
+def box_stats(df, y, by=None):
+    """在服务端计算箱线图的统计量：四分位数、1.5 倍四分位距以内的上下须和均值"""
+    if pd.api.types.is_bool_dtype(df[y]):
+        df = df.assign(**{y: df[y].astype(float)})
+    elif not pd.api.types.is_numeric_dtype(df[y]):
+        raise ValueError(f"箱线图的 Y 轴需要数值列，{y} 的类型为 {df[y].dtype}")
+    data = df[[y]] if by is None else df[[by, y]]
+    data = data.dropna(subset=[y])
+    keys = pd.Series('全部', index=data.index) if by is None else data[by].astype(str)
+    grouped = data[y].groupby(keys, sort=True)
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ['q1', 'median', 'q3']
+    iqr = stats['q3'] - stats['q1']
+    low = (stats['q1'] - 1.5 * iqr).reindex(keys).to_numpy()
+    high = (stats['q3'] + 1.5 * iqr).reindex(keys).to_numpy()
+    values = data[y].to_numpy(dtype=float)
+    inside = (values >= low) & (values <= high)
+    stats['lowerfence'] = pd.Series(values[inside]).groupby(keys.to_numpy()[inside]).min()
+    stats['upperfence'] = pd.Series(values[inside]).groupby(keys.to_numpy()[inside]).max()
+    stats['mean'] = grouped.mean()
+    stats['count'] = grouped.size()
+    return stats
+
+
+def _box(df, y, hue):
+    stats = box_stats(df, y, by=hue)
+    fig = go.Figure(go.Box(
+        x=stats.index.tolist(), q1=stats['q1'], median=stats['median'], q3=stats['q3'],
+        lowerfence=stats['lowerfence'], upperfence=stats['upperfence'], mean=stats['mean'],
+        name=y, boxpoints=False))
+    fig.update_layout(xaxis_title=hue, yaxis_title=y)
+    return fig, len(stats), '聚合'
+
+
+@traced('chart/build')
+def build_figure(df, plot_type, x, y, hue=None, line_method="LTTB", max_points=MAX_LINE_POINTS):
+    """根据数据量选择绘制方式，返回 (图表, 信息)。
+
+    信息包括原始行数、实际发送的点数、绘制方式、图表 JSON 的大小和生成耗时。
+    """
+    start = time.perf_counter()
+    if plot_type == "散点图":
+        fig, points, mode = _scatter(df, x, y, hue)
+    elif plot_type == "折线图":
+        fig, points, mode = _line(df, x, y, hue, line_method, max_points)
+    elif plot_type == "饼图":
+        fig, points, mode = _pie(df, hue if hue is not None else x)
+    elif plot_type == "箱线图":
+        fig, points, mode = _box(df, y, hue)
+    else:
+        raise ValueError(f"未知的图表类型: {plot_type}")
+    payload = len(fig.to_json())
+    info = {
+        'rows': len(df),
+        'points': points,
+        'mode': mode,
+        'payload_bytes': payload,
+        'seconds': time.perf_counter() - start,
+    }
+    return fig, info
+
+
+def elbow_figure(sse, metric="欧式距离"):
+    """肘部图，sse 为 {簇数: 簇内误差}"""
+    y_label = '簇内误差平方和 (SSE)' if metric == "欧式距离" else '簇内距离和'
+    fig = px.line(x=list(sse), y=list(sse.values()), labels={'x': '簇数', 'y': y_label})
+    fig.update_traces(mode='lines+markers')
+    return fig
+
+
+def pca_scatter_figure(projected):
+    return px.scatter(projected, x="PC1", y="PC2", title="PCA 散点图 (前两个主成分)",
+                      labels={"PC1": "主成分 1", "PC2": "主成分 2"})
+
+
+def scree_figure(scree):
+    fig = px.bar(scree, x="主成分", y="方差贡献率 (%)", title="碎石图")
+    fig.add_scatter(x=scree["主成分"], y=scree["累计方差贡献率 (%)"], mode='lines+markers', name="累计方差贡献率 (%)")
+    return fig
@@ -0,0 +1,254 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from analysis.dtypes import convert_frame
+
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def csv_source(source, chunksize=DEFAULT_CHUNKSIZE):
+    """返回一个可以反复调用的函数，每次调用都从头分块读取 CSV。
+
+    source 可以是文件路径或文件内容（bytes），标准化等操作需要多次扫描数据。
+    """
+    def chunks():
+        buffer = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+        yield from pd.read_csv(buffer, chunksize=chunksize)
+    return chunks
+
+
+def read_header(source, nrows=1000):
+    buffer = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    return pd.read_csv(buffer, nrows=nrows)
+
+
+class StreamingStats:
+    """逐块累积数值列的统计量，不需要一次载入全部数据。
+
+    均值和方差按块合并（Chan 等人的并行算法），分位数由固定大小的随机样本近似。
+    """
+
+    def __init__(self, sample_size=100_000, seed=0):
+        self.sample_size = sample_size
+        self._rng = np.random.default_rng(seed)
+        self.count = None
+        self.mean = None
+        self.m2 = None
+        self.min = None
+        self.max = None
+        self._sample = None
+        self._sample_keys = None
+
+    def update(self, chunk):
+        numeric = chunk.select_dtypes(include='number')
+        if self.count is None:
+            columns = numeric.columns
+            self.count = pd.Series(0.0, index=columns)
+            self.mean = pd.Series(0.0, index=columns)
+            self.m2 = pd.Series(0.0, index=columns)
+            self.min = pd.Series(np.inf, index=columns)
+            self.max = pd.Series(-np.inf, index=columns)
+        numeric = numeric.reindex(columns=self.count.index).astype(float)
+        n_b = numeric.count()
+        mean_b = numeric.mean().fillna(0.0)
+        m2_b = (numeric.var(ddof=0) * n_b).fillna(0.0)
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        safe_n = n.where(n > 0, 1)
+        self.mean = self.mean + delta * n_b / safe_n
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.count * n_b / safe_n
+        self.count = n
+        self.min = np.fmin(self.min, numeric.min())
+        self.max = np.fmax(self.max, numeric.max())
+        self._update_sample(numeric)
+
+    def _update_sample(self, numeric):
+        # 给每一行一个随机键，始终保留键最小的 sample_size 行，即在全部数据上均匀抽样
+        keys = self._rng.random(len(numeric))
+        if self._sample is not None:
+            numeric = pd.concat([self._sample, numeric], ignore_index=True)
+            keys = np.concatenate([self._sample_keys, keys])
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            numeric = numeric.iloc[keep].reset_index(drop=True)
+            keys = keys[keep]
+        self._sample = numeric
+        self._sample_keys = keys
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.count - 1).where(self.count > 1))
+
+    def describe(self):
+        """与 DataFrame.describe() 相同格式的结果"""
+        if self.count is None:
+            return pd.DataFrame()
+        quantiles = self._sample.quantile([0.25, 0.5, 0.75])
+        result = pd.DataFrame({
+            'count': self.count,
+            'mean': self.mean.where(self.count > 0),
+            'std': self.std,
+            'min': self.min.replace(np.inf, np.nan),
+            '25%': quantiles.loc[0.25],
+            '50%': quantiles.loc[0.5],
+            '75%': quantiles.loc[0.75],
+            'max': self.max.replace(-np.inf, np.nan),
+        })
+        return result.T
+
+
+class _Deduplicator:
+    # 只保存每一行的 64 位哈希值，而不是行本身
+    def __init__(self):
+        self.seen = set()
+
+    def __call__(self, chunk):
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        keep &= np.fromiter((h not in self.seen for h in hashes), dtype=bool, count=len(hashes))
+        self.seen.update(hashes[keep].tolist())
+        return chunk[keep]
+
+
+def _standardizer(columns, mean, std):
+    def apply(chunk):
+        chunk = chunk.copy(deep=False)
+        chunk[columns] = (chunk[columns] - mean[columns]) / std[columns]
+        return chunk
+    return apply
+
+
+def _fill(column, value):
+    def apply(chunk):
+        chunk = chunk.copy(deep=False)
+        chunk[column] = chunk[column].fillna(value)
+        return chunk
+    return apply
+
+
+def _convert(dtypes):
+    def apply(chunk):
+        return convert_frame(chunk, dtypes)
+    return apply
+
+
+def _unified_dtypes(chunks):
+    """分块读取时每块单独推断类型，同一列可能在一块中是整数、在另一块中是浮点数（如某块含缺失值）。
+
+    先扫描一遍，在任何一块中是浮点数的数值列统一为 float64，同一行在各块中的哈希值和写出格式才一致。
+    """
+    floats, integers = set(), set()
+    for chunk in chunks():
+        for column, dtype in chunk.dtypes.items():
+            if pd.api.types.is_float_dtype(dtype):
+                floats.add(column)
+            elif pd.api.types.is_integer_dtype(dtype):
+                integers.add(column)
+    return {column: 'float64' for column in floats & integers}
+
+
+def _astype(dtypes):
+    def apply(chunk):
+        columns = {column: dtype for column, dtype in dtypes.items() if column in chunk.columns}
+        return chunk.astype(columns) if columns else chunk
+    return apply
+
+
+def _chunk_ops(steps, fitted):
+    # 每次扫描都重新创建去重器，保证各次扫描的结果一致
+    ops = []
+    if fitted.get('dtypes'):
+        ops.append(_astype(fitted['dtypes']))
+    for i, step in enumerate(steps):
+        op, params = step['op'], step['params']
+        if op == 'dropna':
+            ops.append(lambda chunk: chunk.dropna())
+        elif op == 'fillna':
+            ops.append(_fill(params['column'], params['value']))
+        elif op == 'drop_duplicates':
+            ops.append(_Deduplicator())
+        elif op == 'standardize':
+            mean, std = fitted[i]
+            ops.append(_standardizer(params['columns'], mean, std))
+        elif op == 'convert_types':
+            ops.append(_convert(params['dtypes']))
+        else:
+            raise ValueError(f"分块模式不支持的操作: {op}")
+    return ops
+
+
+def _stream(chunks, steps, fitted):
+    ops = _chunk_ops(steps, fitted)
+    for chunk in chunks():
+        for op in ops:
+            chunk = op(chunk)
+        yield chunk
+
+
+def _fit(chunks, steps):
+    """标准化需要整列的均值和标准差：每遇到一个标准化步骤，先完整扫描一遍它之前的结果"""
+    fitted = {}
+    # 去重按整行的哈希值判断，各块的列类型必须一致
+    if any(step['op'] == 'drop_duplicates' for step in steps):
+        fitted['dtypes'] = _unified_dtypes(chunks)
+    for i, step in enumerate(steps):
+        if step['op'] == 'standardize':
+            stats = StreamingStats(sample_size=1)
+            for chunk in _stream(chunks, steps[:i], fitted):
+                stats.update(chunk[step['params']['columns']])
+            fitted[i] = (stats.mean, stats.std)
+    return fitted
+
+
+def processed_chunks(chunks, steps):
+    """返回与 chunks 用法相同的函数，每次调用都给出执行完处理步骤后的数据块"""
+    steps = list(steps)
+    fitted = _fit(chunks, steps)
+
+    def processed():
+        return _stream(chunks, steps, fitted)
+    return processed
+
+
+def stream_describe(chunks, steps=()):
+    stats = StreamingStats()
+    for chunk in _stream(chunks, list(steps), _fit(chunks, list(steps))):
+        stats.update(chunk)
+    return stats.describe()
+
+
+def run_chunked(chunks, steps, output_file, on_chunk=None):
+    """分块执行处理步骤，结果逐块追加写入 output_file，返回写出的行数。
+
+    on_chunk(已写出的行数) 在每块写完后调用。
+    """
+    steps = list(steps)
+    fitted = _fit(chunks, steps)
+    rows = 0
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        for i, chunk in enumerate(_stream(chunks, steps, fitted)):
+            chunk.to_csv(f, header=(i == 0), index=False)
+            rows += len(chunk)
+            if on_chunk is not None:
+                on_chunk(rows)
+    return rows
+
+
+def checked_chunks(chunks, check):
+    """每读一块之前调用 check()，后台任务借此在块之间响应取消"""
+    def checked():
+        for chunk in chunks():
+            check()
+            yield chunk
+    return checked
+
+
+def frame_chunks(df, chunksize=DEFAULT_CHUNKSIZE):
+    """把内存中的数据按行切块，与 csv_source 返回的函数用法相同"""
+    def chunks():
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    return chunks
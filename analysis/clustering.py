@@ -0,0 +1,183 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from analysis.cache import LRUCache, frame_hash
+from analysis.instrument import traced
+
+
+METRICS = ["欧式距离", "曼哈顿距离"]
+
+# 超过该行数时，欧式距离改用 MiniBatchKMeans，曼哈顿距离改为先抽样拟合再分配全部数据
+LARGE_ROWS = 100_000
+SAMPLE_ROWS = 50_000
+
+
+def _l1_distances(X, centers):
+    # 逐个簇中心计算，内存占用为 行数 × 簇数
+    distances = np.empty((len(X), len(centers)))
+    for j, center in enumerate(centers):
+        distances[:, j] = np.abs(X - center).sum(axis=1)
+    return distances
+
+
+class KMedians:
+    """曼哈顿（L1）距离下的聚类：按 L1 距离分配，簇中心取各维度的中位数"""
+
+    def __init__(self, n_clusters, max_iter=100, random_state=0):
+        self.n_clusters = n_clusters
+        self.max_iter = max_iter
+        self.random_state = random_state
+
+    def _init_centers(self, X, rng):
+        # 与 k-means++ 相同的思路，按与已选中心的 L1 距离加权抽取初始中心
+        centers = [X[rng.integers(len(X))]]
+        closest = np.abs(X - centers[0]).sum(axis=1)
+        for _ in range(1, self.n_clusters):
+            total = closest.sum()
+            if total == 0:
+                index = rng.integers(len(X))
+            else:
+                index = rng.choice(len(X), p=closest / total)
+            centers.append(X[index])
+            closest = np.minimum(closest, np.abs(X - X[index]).sum(axis=1))
+        return np.array(centers, dtype=float)
+
+    def fit(self, X):
+        X = np.asarray(X, dtype=float)
+        rng = np.random.default_rng(self.random_state)
+        centers = self._init_centers(X, rng)
+        for self.n_iter_ in range(1, self.max_iter + 1):
+            labels = _l1_distances(X, centers).argmin(axis=1)
+            new_centers = centers.copy()
+            for j in range(self.n_clusters):
+                members = X[labels == j]
+                # 空簇保留原来的中心
+                if len(members):
+                    new_centers[j] = np.median(members, axis=0)
+            if np.allclose(new_centers, centers):
+                break
+            centers = new_centers
+        self.cluster_centers_ = centers
+        distances = _l1_distances(X, centers)
+        self.labels_ = distances.argmin(axis=1)
+        self.inertia_ = float(distances.min(axis=1).sum())
+        return self
+
+    def predict(self, X):
+        return _l1_distances(np.asarray(X, dtype=float), self.cluster_centers_).argmin(axis=1)
+
+    def fit_predict(self, X):
+        return self.fit(X).labels_
+
+
+class ClusterResult:
+    def __init__(self, k, metric, model, labels, inertia, method):
+        self.k = k
+        self.metric = metric
+        self.model = model
+        self.labels = labels
+        self.inertia = inertia
+        self.method = method
+
+
+@traced('fit/clusters')
+def fit_clusters(X, k, metric="欧式距离", random_state=0):
+    """按数据量选择算法拟合一个聚类模型"""
+    X = np.asarray(X, dtype=float)
+    large = len(X) > LARGE_ROWS
+    if metric == "曼哈顿距离":
+        model = KMedians(n_clusters=k, random_state=random_state)
+        if large:
+            # 先在抽样数据上拟合簇中心，再把全部数据分配到最近的中心
+            rng = np.random.default_rng(random_state)
+            sample = X[rng.choice(len(X), SAMPLE_ROWS, replace=False)]
+            model.fit(sample)
+            distances = _l1_distances(X, model.cluster_centers_)
+            labels = distances.argmin(axis=1)
+            inertia = float(distances.min(axis=1).sum())
+            method = "K-medians（抽样拟合后分配）"
+        else:
+            model.fit(X)
+            labels, inertia = model.labels_, model.inertia_
+            method = "K-medians"
+    elif metric == "欧式距离":
+        if large:
+            from sklearn.cluster import MiniBatchKMeans
+            model = MiniBatchKMeans(n_clusters=k, random_state=random_state, batch_size=4096, n_init=3)
+            method = "MiniBatchKMeans"
+        else:
+            from sklearn.cluster import KMeans
+            model = KMeans(n_clusters=k, random_state=random_state)
+            method = "KMeans"
+        model.fit(X)
+        labels, inertia = model.labels_, float(model.inertia_)
+    else:
+        raise ValueError(f"未知的距离度量: {metric}")
+    return ClusterResult(k, metric, model, labels.astype(np.int32), inertia, method)
+
+
+def describe_clusters(df, columns, labels):
+    """各簇在所选列上的描述性统计"""
+    return df[columns].assign(Cluster=labels).groupby('Cluster')[columns].describe()
+
+
+class ClusteringEngine:
+    """缓存拟合好的聚类模型，键为 (数据哈希, 列, 簇数, 距离度量)。
+
+    肘部图中已经拟合过的簇数，执行聚类时直接取用。
+    """
+
+    def __init__(self, max_models=64, max_workers=None, budget=None):
+        self.max_workers = max_workers or min(10, os.cpu_count() or 1)
+        self._models = LRUCache(max_models, budget, 'clustering')
+
+    def fit(self, df, columns, k, metric="欧式距离", data_key=None):
+        if data_key is None:
+            data_key = frame_hash(df[columns])
+        key = (data_key, tuple(columns), k, metric)
+        return self._models.get_or_create(
+            key, lambda: fit_clusters(df[columns].to_numpy(dtype=float), k, metric))
+
+    @traced('fit/elbow')
+    def elbow(self, df, columns, ks=range(1, 11), metric="欧式距离", data_key=None, on_result=None):
+        """并行拟合多个簇数，返回 {簇数: 簇内误差}。
+
+        on_result(簇数, 簇内误差) 在每个簇数完成时调用，抛出异常可以中止剩余的拟合。
+        各簇数之间并行，每次拟合只用一个 OpenMP 线程，总线程数不超过 max_workers（默认不超过 CPU 核数）。
+        """
+        from threadpoolctl import threadpool_limits
+        if data_key is None:
+            data_key = frame_hash(df[columns])
+        X = df[columns].to_numpy(dtype=float)
+        results = {}
+        missing = []
+        for k in ks:
+            result = self._models.get((data_key, tuple(columns), k, metric))
+            if result is None:
+                missing.append(k)
+            else:
+                results[k] = result.inertia
+                if on_result is not None:
+                    on_result(k, result.inertia)
+
+        def fit_one(k):
+            # KMeans 默认每次拟合都用满所有核，多个拟合同时进行会严重超额订阅 CPU；
+            # OpenMP 的线程数设置只对调用它的线程有效，不影响其他会话的拟合
+            with threadpool_limits(limits=1, user_api='openmp'):
+                result = fit_clusters(X, k, metric)
+            self._models.put((data_key, tuple(columns), k, metric), result)
+            return k, result.inertia
+
+        if missing:
+            pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            try:
+                for k, inertia in pool.map(fit_one, missing):
+                    results[k] = inertia
+                    if on_result is not None:
+                        on_result(k, inertia)
+            finally:
+                # on_result 抛出异常（如任务被取消）时，还没开始的簇数不再拟合
+                pool.shutdown(cancel_futures=True)
+        return dict(sorted(results.items()))
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from analysis.cache import LRUCache, frame_hash
+from analysis.instrument import traced
+
+
+# 超过该行数时使用 IncrementalPCA 分块拟合，内存只与每块大小有关
+LARGE_ROWS = 200_000
+CHUNK_ROWS = 50_000
+# 超过该列数时使用随机 SVD，只计算前 MAX_COMPONENTS 个主成分
+WIDE_COLUMNS = 100
+MAX_COMPONENTS = 50
+# 散点图最多绘制的点数
+PLOT_ROWS = 5_000
+
+
+def max_components(n_rows, n_columns):
+    """可以提供的主成分数量上限"""
+    limit = min(n_rows, n_columns)
+    if n_columns > WIDE_COLUMNS:
+        limit = min(limit, MAX_COMPONENTS)
+    return limit
+
+
+@traced('fit/pca')
+def fit_decomposition(df, columns):
+    """对所选列拟合一次全部可用的主成分，返回拟合好的模型和所用方法"""
+    n_rows, n_columns = len(df), len(columns)
+    n_components = max_components(n_rows, n_columns)
+    if n_rows > LARGE_ROWS:
+        from sklearn.decomposition import IncrementalPCA
+        batch = max(CHUNK_ROWS, n_components)
+        model = IncrementalPCA(n_components=n_components, batch_size=batch)
+        # 逐块转换为浮点数并拟合，不一次性生成整个矩阵
+        for start in range(0, n_rows, batch):
+            chunk = df[columns].iloc[start:start + batch].to_numpy(dtype=float)
+            if len(chunk) >= n_components:
+                model.partial_fit(chunk)
+        return model, "IncrementalPCA"
+    from sklearn.decomposition import PCA
+    X = df[columns].to_numpy(dtype=float)
+    if n_columns > WIDE_COLUMNS:
+        model = PCA(n_components=n_components, svd_solver='randomized', random_state=0)
+        method = "随机 SVD"
+    else:
+        model = PCA(n_components=n_components)
+        method = "PCA"
+    model.fit(X)
+    return model, method
+
+
+class Decomposition:
+    """一次拟合的结果，任意数量的主成分都从中截取，不需要重新拟合"""
+
+    def __init__(self, model, method):
+        self.method = method
+        self.mean = model.mean_
+        self.components = model.components_
+        self.explained_variance_ratio = model.explained_variance_ratio_
+
+    @property
+    def n_components(self):
+        return len(self.components)
+
+    def variance_table(self, n_components):
+        return pd.DataFrame({
+            "主成分": [f"PC{i + 1}" for i in range(n_components)],
+            "方差贡献率 (%)": self.explained_variance_ratio[:n_components] * 100,
+        })
+
+    def scree(self):
+        ratio = self.explained_variance_ratio * 100
+        return pd.DataFrame({
+            "主成分": [f"PC{i + 1}" for i in range(len(ratio))],
+            "方差贡献率 (%)": ratio,
+            "累计方差贡献率 (%)": np.cumsum(ratio),
+        })
+
+    def transform(self, X, n_components):
+        X = np.asarray(X, dtype=float)
+        result = (X - self.mean) @ self.components[:n_components].T
+        return pd.DataFrame(result, columns=[f"PC{i + 1}" for i in range(n_components)])
+
+
+class DecompositionEngine:
+    """按 (数据哈希, 列) 缓存主成分分析结果"""
+
+    def __init__(self, max_models=16, budget=None):
+        self._models = LRUCache(max_models, budget, 'decomposition')
+
+    def fit(self, df, columns, data_key=None):
+        if data_key is None:
+            data_key = frame_hash(df[columns])
+
+        def create():
+            return Decomposition(*fit_decomposition(df, columns))
+        return self._models.get_or_create((data_key, tuple(columns)), create)
+
+    def project(self, df, columns, n_components, data_key=None, rows=None, random_state=0):
+        """只投影部分行：rows 为 None 时全部投影，否则随机抽取 rows 行用于绘图"""
+        decomposition = self.fit(df, columns, data_key=data_key)
+        data = df[columns]
+        if rows is not None and len(data) > rows:
+            data = data.sample(n=rows, random_state=random_state)
+        return decomposition.transform(data.to_numpy(dtype=float), n_components)
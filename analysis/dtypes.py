@@ -0,0 +1,184 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from analysis.cache import LRUCache
+from analysis.instrument import traced
+
+
+# 页面上可选的数据类型
+DTYPE_OPTIONS = ["整数", "浮点数", "字符串", "时间数据", "分类", "布尔"]
+
+# 推断类型时抽样的行数
+SAMPLE_ROWS = 10_000
+# 抽样中能解析为数值/时间的比例超过该值时，认为整列是该类型
+PARSE_RATIO = 0.95
+# 尝试按时间解析的试探行数
+DATETIME_PROBE = 50
+# 不同取值占比低于该值的字符串列推断为分类
+CATEGORY_RATIO = 0.5
+
+TRUE_VALUES = {'true', 'yes', 'y', 't', '是'}
+FALSE_VALUES = {'false', 'no', 'n', 'f', '否'}
+
+INT32 = np.iinfo(np.int32)
+
+
+def dtype_label(dtype):
+    """已有数据类型在页面上对应的选项"""
+    if pd.api.types.is_bool_dtype(dtype):
+        return "布尔"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "整数"
+    if pd.api.types.is_float_dtype(dtype):
+        return "浮点数"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "时间数据"
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "分类"
+    return "字符串"
+
+
+def _sample(series, rows):
+    if len(series) <= rows:
+        return series
+    # 固定随机种子，同一数据每次推断的结果相同
+    index = np.random.default_rng(0).choice(len(series), rows, replace=False)
+    return series.iloc[np.sort(index)]
+
+
+def _parse_ratio(values):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return pd.to_datetime(values, errors='coerce', format='mixed').notna().mean()
+
+
+def _infer_text(values):
+    # values 为去掉缺失值的字符串样本
+    numeric = pd.to_numeric(values, errors='coerce')
+    if numeric.notna().mean() >= PARSE_RATIO:
+        valid = numeric.dropna()
+        return "整数" if (valid == np.trunc(valid)).all() else "浮点数"
+    lowered = values.str.strip().str.lower()
+    if lowered.isin(TRUE_VALUES | FALSE_VALUES).all():
+        return "布尔"
+    # 逐个尝试日期格式很慢：先在少量值上试探，大部分能解析时才解析整个样本
+    if values.str.contains(r'\d').mean() >= PARSE_RATIO and _parse_ratio(values.iloc[:DATETIME_PROBE]) >= PARSE_RATIO:
+        if _parse_ratio(values) >= PARSE_RATIO:
+            return "时间数据"
+    if values.nunique() <= CATEGORY_RATIO * len(values):
+        return "分类"
+    return "字符串"
+
+
+def _integral(series):
+    """整列的数值是否都是整数：抽样中没有小数不代表整列没有，转换为整数会截断小数部分"""
+    values = pd.to_numeric(series, errors='coerce').dropna()
+    return bool((values == np.trunc(values)).all())
+
+
+def infer_column(series, sample_rows=SAMPLE_ROWS):
+    """根据抽样的行推断一列的类型"""
+    label = dtype_label(series.dtype)
+    # 只有 0/1 两种取值的整数列仍按整数处理，不推断为布尔
+    if label in ("整数", "布尔", "时间数据", "分类"):
+        return label
+    values = _sample(series, sample_rows).dropna()
+    if len(values) == 0:
+        return label
+    if label == "浮点数":
+        # 因含缺失值而被读成浮点数的整数列
+        inferred = "整数" if (values == np.trunc(values)).all() else label
+    else:
+        inferred = _infer_text(values.astype(str))
+    # 抽样推断为整数的列，在整列上确认后才转换，否则按浮点数处理
+    if inferred == "整数" and not _integral(series):
+        return "浮点数"
+    return inferred
+
+
+@traced('types/infer')
+def infer_dtypes(df, sample_rows=SAMPLE_ROWS):
+    return {column: infer_column(df[column], sample_rows) for column in df.columns}
+
+
+def _to_bool(series):
+    lowered = series.astype(str).str.strip().str.lower()
+    result = pd.Series(pd.NA, index=series.index, dtype='boolean')
+    result[lowered.isin(TRUE_VALUES | {'1', '1.0'})] = True
+    result[lowered.isin(FALSE_VALUES | {'0', '0.0'})] = False
+    return result
+
+
+def _to_int(series):
+    values = pd.to_numeric(series, errors='coerce')
+    if pd.api.types.is_float_dtype(values):
+        values = np.trunc(values.where(np.isfinite(values)))
+    valid = values.dropna()
+    fits = len(valid) == 0 or (valid.min() >= INT32.min and valid.max() <= INT32.max)
+    # 含缺失值时使用可空整数类型，不再把缺失值填充为 0
+    if values.hasnans:
+        return values.astype('Int32' if fits else 'Int64')
+    return values.astype(np.int32 if fits else np.int64)
+
+
+def _to_float(series):
+    values = pd.to_numeric(series, errors='coerce').astype(np.float64)
+    narrow = values.astype(np.float32)
+    # 只有转换为 float32 后数值不变时才压缩，否则保留 float64
+    if narrow.astype(np.float64).equals(values):
+        return narrow
+    return values
+
+
+@traced('types/convert')
+def convert_column(series, dtype):
+    """把一列转换为用户选择的类型，数值列在不改变数值时使用 32 位类型以减少内存"""
+    if dtype == "整数":
+        return _to_int(series)
+    elif dtype == "浮点数":
+        return _to_float(series)
+    elif dtype == "时间数据":
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return pd.to_datetime(series, errors='coerce', format='mixed')
+    elif dtype == "分类":
+        return series.astype('category')
+    elif dtype == "布尔":
+        return series.astype('boolean') if pd.api.types.is_bool_dtype(series.dtype) else _to_bool(series)
+    return series.astype(str)
+
+
+def needs_conversion(series, dtype):
+    """转换是否会改变该列：类型不同，或可以压缩为更小的类型"""
+    if dtype_label(series.dtype) != dtype:
+        return True
+    if dtype == "整数" and series.dtype.itemsize > 4:
+        valid = series.dropna()
+        return len(valid) == 0 or (valid.min() >= INT32.min and valid.max() <= INT32.max)
+    if dtype == "浮点数" and series.dtype.itemsize > 4:
+        return _to_float(series).dtype.itemsize < series.dtype.itemsize
+    return False
+
+
+def convert_frame(df, dtypes):
+    """一次转换多列，返回新的 DataFrame，未转换的列与原数据共享内存"""
+    columns = {column: convert_column(df[column], dtype) for column, dtype in dtypes.items()}
+    df = df.copy(deep=False)
+    for column, values in columns.items():
+        df[column] = values
+    return df
+
+
+class TypeConverter:
+    """缓存类型推断的结果，键为数据版本。
+
+    转换本身在应用类型修改时由流水线的 convert_types 步骤执行，结果随流水线缓存。
+    """
+
+    def __init__(self, budget=None):
+        self._inferred = LRUCache(8, budget, 'inferred-dtypes')
+
+    def infer(self, df, data_key):
+        return self._inferred.get_or_create(data_key, lambda: infer_dtypes(df))
@@ -0,0 +1,158 @@
+import contextvars
+import functools
+import json
+import os
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+
+# 当前线程正在记录的 Recorder；没有时 span 不做任何事，开销可以忽略
+_current = contextvars.ContextVar('recorder', default=None)
+
+
+def _rss_bytes():
+    # 进程当前占用的物理内存，只在 Linux 上可用
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Recorder:
+    """记录一次运行中各段代码的耗时和内存变化。
+
+    trace_memory 为 True 时用 tracemalloc 测量每段的峰值内存，比较准确但会明显拖慢运行；
+    否则只记录物理内存（RSS）的变化。
+    """
+
+    def __init__(self, trace_memory=False, **attrs):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.trace_memory = trace_memory
+        self.attrs = attrs
+        self.spans = []
+        self._stack = []
+        self._start = time.perf_counter()
+        self.seconds = None
+        # tracemalloc 是进程级的，只停止自己启动的跟踪
+        self._owns_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        frame = {'child_peak': 0}
+        if self.trace_memory:
+            # 外层的峰值会被 reset_peak 清掉，先记到外层的帧上
+            if self._stack:
+                self._stack[-1]['child_peak'] = max(self._stack[-1]['child_peak'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            frame['traced'] = tracemalloc.get_traced_memory()[0]
+        record = {
+            'name': name,
+            'parent': self._stack[-1]['record']['name'] if self._stack else None,
+            'depth': len(self._stack),
+            'start': time.perf_counter() - self._start,
+            **attrs,
+        }
+        frame['record'] = record
+        rss = _rss_bytes()
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            end_rss = _rss_bytes()
+            record['rss_delta_mb'] = (end_rss - rss) / 1024 ** 2 if rss is not None and end_rss is not None else None
+            self._stack.pop()
+            if self.trace_memory:
+                peak = max(tracemalloc.get_traced_memory()[1], frame['child_peak'])
+                record['peak_mb'] = (peak - frame['traced']) / 1024 ** 2
+                if self._stack:
+                    self._stack[-1]['child_peak'] = max(self._stack[-1]['child_peak'], peak)
+            self.spans.append(record)
+
+    def attach(self, name, seconds, spans=(), **attrs):
+        """把在别处记录的一段加入本次运行，作为当前段的子段，开始时间记为现在。
+
+        用于后台任务：任务在自己的线程中用单独的 Recorder 记录，spans 为其中的各段，挂在这一段下面。
+        """
+        start = time.perf_counter() - self._start
+        depth = len(self._stack)
+        self.spans.append({
+            'name': name,
+            'parent': self._stack[-1]['record']['name'] if self._stack else None,
+            'depth': depth,
+            'start': start,
+            'seconds': seconds,
+            'rss_delta_mb': None,
+            **attrs,
+        })
+        for record in spans:
+            self.spans.append({**record, 'parent': record['parent'] or name, 'depth': depth + 1 + record['depth'],
+                               'start': start + record['start']})
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._start
+        if self._owns_tracing:
+            tracemalloc.stop()
+
+    def records(self):
+        """每段一条记录，附带运行编号等公共字段，按开始时间排序"""
+        common = {'run_id': self.run_id, 'started_at': self.started_at, **self.attrs}
+        return [{**common, **span} for span in sorted(self.spans, key=lambda s: s['start'])]
+
+    def summary(self):
+        return {'run_id': self.run_id, 'started_at': self.started_at, 'seconds': self.seconds,
+                'spans': len(self.spans), **self.attrs}
+
+
+def activate(recorder):
+    return _current.set(recorder)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def span(name, **attrs):
+    """在当前 Recorder 中记录一段代码；没有 Recorder 时什么也不做"""
+    recorder = _current.get()
+    if recorder is None:
+        yield None
+        return
+    with recorder.span(name, **attrs) as record:
+        yield record
+
+
+def attach(name, seconds, spans=(), **attrs):
+    """在当前 Recorder 中加入一段在别处记录的代码（见 Recorder.attach）；没有 Recorder 时什么也不做"""
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.attach(name, seconds, spans, **attrs)
+
+
+def traced(name):
+    """把整个函数记录为一段"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def to_jsonl(records):
+    return ''.join(json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in records)
+
+
+def append_log(records, path):
+    """以 JSON Lines 格式追加到日志文件，便于导入监控系统"""
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(to_jsonl(records))
@@ -0,0 +1,240 @@
+"""批量执行分析任务，不需要 Streamlit。
+
+任务说明是一个 JSON 文件，例如：
+
+    {
+        "inputs": ["data/*.csv"],
+        "output": "results",
+        "types": "auto",
+        "steps": [{"op": "dropna", "params": {}}],
+        "tasks": [
+            {"task": "profile"},
+            {"task": "kmeans", "columns": ["Age", "Fare"], "k": 3},
+            {"task": "logit", "y": "Survived", "x": ["Age", "Fare"]}
+        ]
+    }
+
+每个输入文件的结果写入 output/<文件名>/，所有文件的执行情况写入 output/manifest.json。
+
+    python -m analysis.jobs job.json --workers 4
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from analysis.loader import load_path
+from analysis.pipeline import Pipeline
+
+
+def _write_table(table, path, index=True):
+    table.to_csv(path, index=index, encoding='utf-8-sig')
+    return path
+
+
+def _write_json(data, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    return path
+
+
+def _write_figure(fig, path):
+    # 保存为独立的 HTML 文件，不需要额外的图片导出依赖
+    fig.write_html(path, include_plotlyjs='cdn')
+    return path
+
+
+def task_profile(df, prefix):
+    from analysis.dtypes import infer_dtypes
+    from analysis.profile import profile_column, profile_table
+    profiles = {column: profile_column(df[column]) for column in df.columns}
+    return [_write_table(profile_table(profiles), f"{prefix}_profile.csv"),
+            _write_json(infer_dtypes(df), f"{prefix}_types.json")]
+
+
+def task_query(df, prefix, value, column=None, mode="fuzzy"):
+    from analysis.query import QueryEngine
+    result = QueryEngine(df).query(str(value), column=column, mode=mode)
+    return [_write_table(result, f"{prefix}_query.csv", index=False)]
+
+
+def task_chart(df, prefix, plot_type, x, y=None, hue=None):
+    from analysis.charts import build_figure
+    fig, _ = build_figure(df, plot_type, x, y, hue)
+    return [_write_figure(fig, f"{prefix}_chart.html")]
+
+
+def task_kmeans(df, prefix, columns, k=3, metric="欧式距离", elbow=None):
+    from analysis.charts import elbow_figure
+    from analysis.clustering import ClusteringEngine, describe_clusters
+    engine = ClusteringEngine()
+    result = engine.fit(df, columns, k, metric)
+    outputs = [
+        _write_table(df[columns].assign(Cluster=result.labels), f"{prefix}_labels.csv", index=False),
+        _write_table(describe_clusters(df, columns, result.labels), f"{prefix}_clusters.csv"),
+        _write_json({'method': result.method, 'k': k, 'metric': metric, 'inertia': result.inertia},
+                    f"{prefix}_model.json"),
+    ]
+    if elbow:
+        sse = engine.elbow(df, columns, range(1, int(elbow) + 1), metric)
+        outputs.append(_write_json(sse, f"{prefix}_elbow.json"))
+        outputs.append(_write_figure(elbow_figure(sse, metric), f"{prefix}_elbow.html"))
+    return outputs
+
+
+def task_pca(df, prefix, columns, n_components=2):
+    import pandas as pd
+    from analysis.charts import pca_scatter_figure, scree_figure
+    from analysis.decomposition import PLOT_ROWS, DecompositionEngine
+    engine = DecompositionEngine()
+    decomposition = engine.fit(df, columns)
+    loadings = pd.DataFrame(decomposition.components[:n_components], columns=columns,
+                            index=[f"PC{i + 1}" for i in range(n_components)])
+    outputs = [
+        _write_table(decomposition.variance_table(n_components), f"{prefix}_variance.csv", index=False),
+        _write_table(loadings, f"{prefix}_loadings.csv"),
+        _write_table(engine.project(df, columns, n_components), f"{prefix}_projection.csv", index=False),
+        _write_figure(scree_figure(decomposition.scree()), f"{prefix}_scree.html"),
+    ]
+    if n_components >= 2:
+        projected = engine.project(df, columns, 2, rows=PLOT_ROWS)
+        outputs.append(_write_figure(pca_scatter_figure(projected), f"{prefix}_scatter.html"))
+    return outputs
+
+
+def task_ols(df, prefix, y, x):
+    from analysis.regression import coef_table, fit_ols, model_stats
+    model = fit_ols(df, y, x)
+    with open(f"{prefix}_summary.txt", 'w', encoding='utf-8') as f:
+        f.write(str(model.summary()))
+    return [_write_table(coef_table(model), f"{prefix}_coef.csv"),
+            _write_table(model_stats(model), f"{prefix}_stats.csv"),
+            f"{prefix}_summary.txt"]
+
+
+def task_logit(df, prefix, y, x, forest=True):
+    from analysis.regression import build_formula, coef_table, fit_glm, forest_plot, or_table
+    data = df[[y] + list(x)].astype(float)
+    model = fit_glm(data, build_formula(y, x), 'binomial')
+    stat = or_table(model)
+    outputs = [_write_table(coef_table(model), f"{prefix}_coef.csv"),
+               _write_table(stat, f"{prefix}_or.csv")]
+    if forest:
+        forest_plot(stat).save(f"{prefix}_forest.png", verbose=False)
+        outputs.append(f"{prefix}_forest.png")
+    return outputs
+
+
+def task_save(df, prefix, fmt="CSV"):
+    from analysis.storage import FORMATS, save_frame
+    path = f"{prefix}_data{FORMATS[fmt]}"
+    save_frame(df, path)
+    return [path]
+
+
+# 任务名 -> 函数，函数的参数与任务说明中的字段同名
+TASKS = {
+    'profile': task_profile,
+    'query': task_query,
+    'chart': task_chart,
+    'kmeans': task_kmeans,
+    'pca': task_pca,
+    'ols': task_ols,
+    'logit': task_logit,
+    'save': task_save,
+}
+
+
+def prepare(df, spec):
+    """按任务说明转换数据类型并执行处理步骤"""
+    from analysis.dtypes import convert_frame, infer_dtypes
+    types = spec.get('types')
+    if types == 'auto':
+        df = convert_frame(df, infer_dtypes(df))
+    elif types:
+        df = convert_frame(df, types)
+    return Pipeline(spec.get('steps', [])).apply(df)
+
+
+def run_file(spec, path, name=None):
+    """对一个输入文件执行全部任务，结果写入输出目录下的 name 子目录；单个任务出错不影响其余任务"""
+    start = time.perf_counter()
+    if name is None:
+        name = os.path.splitext(os.path.basename(path))[0]
+    output_dir = os.path.join(spec.get('output', 'results'), name)
+    os.makedirs(output_dir, exist_ok=True)
+    record = {'input': path, 'output': output_dir, 'outputs': [], 'errors': {}}
+    try:
+        _, df = load_path(path)
+        df = prepare(df, spec)
+        record['rows'] = len(df)
+    except Exception as e:
+        record['errors']['load'] = f"{type(e).__name__}: {e}"
+        df = None
+    for i, task in enumerate(spec.get('tasks', []) if df is not None else []):
+        params = dict(task)
+        task_name = params.pop('task')
+        label = f"{i + 1}_{task_name}"
+        try:
+            if task_name not in TASKS:
+                raise ValueError(f"未知的任务: {task_name}")
+            record['outputs'] += TASKS[task_name](df, os.path.join(output_dir, label), **params)
+        except Exception as e:
+            record['errors'][label] = f"{type(e).__name__}: {e}"
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+
+def expand_inputs(patterns):
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches if matches else [pattern])
+    return list(dict.fromkeys(paths))
+
+
+def output_names(paths):
+    """各输入文件的输出子目录名：文件名去掉扩展名，不同目录下的同名文件依次加上 _2、_3……"""
+    names = []
+    used = set()
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, n = stem, 1
+        while name in used:
+            n += 1
+            name = f"{stem}_{n}"
+        used.add(name)
+        names.append(name)
+    return names
+
+
+def run_jobs(spec, workers=None):
+    """在进程池中并行处理所有输入文件，返回并写出每个文件的执行记录"""
+    paths = expand_inputs(spec['inputs'])
+    # 子目录名在分发前统一确定，并行的进程不会写入同一个目录
+    names = output_names(paths)
+    os.makedirs(spec.get('output', 'results'), exist_ok=True)
+    if workers == 1 or len(paths) <= 1:
+        records = [run_file(spec, path, name) for path, name in zip(paths, names)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            records = list(pool.map(run_file, [spec] * len(paths), paths, names))
+    _write_json(records, os.path.join(spec.get('output', 'results'), 'manifest.json'))
+    return records
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="按任务说明批量执行数据分析")
+    parser.add_argument('spec', help="任务说明 JSON 文件")
+    parser.add_argument('--workers', type=int, default=None, help="并行进程数，默认为 CPU 核数")
+    parser.add_argument('--output', help="覆盖任务说明中的输出目录")
+    args = parser.parse_args()
+    with open(args.spec, encoding='utf-8') as f:
+        spec = json.load(f)
+    if args.output:
+        spec['output'] = args.output
+    for record in run_jobs(spec, workers=args.workers):
+        status = "失败: " + "; ".join(f"{k} {v}" for k, v in record['errors'].items()) if record['errors'] else "完成"
+        print(f"{record['input']}: {len(record['outputs'])} 个结果文件，{record['seconds']:.2f} 秒，{status}")
@@ -0,0 +1,87 @@
+import hashlib
+import io
+import os
+
+import pandas as pd
+
+from analysis.instrument import traced
+from analysis.storage import COLUMNAR_EXTENSIONS, file_key, load_frame
+
+
+# 解析 CSV 的引擎：pyarrow 为多线程解析，未安装时退回 pandas 默认的 C 引擎
+CSV_ENGINES = ["c", "pyarrow"]
+
+
+def has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def content_hash(data):
+    """按文件内容计算哈希，作为缓存的键"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _read_csv(buffer, engine="c"):
+    if engine == "pyarrow" and has_pyarrow():
+        return pd.read_csv(buffer, engine="pyarrow")
+    return pd.read_csv(buffer)
+
+
+def _read_excel(buffer, engine=None):
+    return pd.read_excel(buffer)
+
+
+def _read_json(buffer, engine=None):
+    return pd.read_json(buffer)
+
+
+def _read_parquet(buffer, engine=None):
+    return pd.read_parquet(buffer)
+
+
+def _read_feather(buffer, engine=None):
+    return pd.read_feather(buffer)
+
+
+READERS = {
+    ".csv": _read_csv,
+    ".xlsx": _read_excel,
+    ".json": _read_json,
+    ".parquet": _read_parquet,
+    ".feather": _read_feather,
+    ".arrow": _read_feather,
+}
+
+
+@traced('load/parse')
+def read_table(data, name, engine="c"):
+    """根据文件扩展名选择对应的 pandas 读取函数"""
+    ext = os.path.splitext(name)[1].lower()
+    reader = READERS.get(ext)
+    if reader is None:
+        raise ValueError(f"不支持的文件类型: {ext}")
+    return reader(io.BytesIO(data), engine=engine)
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def load_bytes(data, name, engine="c", key=None):
+    """解析文件内容，返回 (键, DataFrame)。在会话间共享解析结果见 analysis.store.DatasetStore"""
+    if key is None:
+        key = content_hash(data)
+    return key, read_table(data, name, engine=engine)
+
+
+def load_path(path, engine="c"):
+    # 列式文件直接内存映射读取，键由路径和修改时间决定，无需读出全部内容计算哈希
+    if os.path.splitext(path)[1].lower() in COLUMNAR_EXTENSIONS:
+        return file_key(path), load_frame(path, memory_map=True)
+    with open(path, "rb") as f:
+        data = f.read()
+    return load_bytes(data, os.path.basename(path), engine=engine)
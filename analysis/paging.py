@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from analysis.instrument import traced
+from analysis.query import ColumnIndex
+
+
+# 生成下载文件时每次转换为 CSV 的行数
+CSV_CHUNK_ROWS = 50_000
+
+
+class ResultView:
+    """基础数据上的一组行位置。
+
+    筛选和排序只产生新的位置数组，不复制数据；页面上只取当前页的行。
+    columns 为只显示和下载的列，不给出时为全部列。
+    """
+
+    def __init__(self, base, rows=None, columns=None):
+        self.base = base
+        self.rows = np.arange(len(base)) if rows is None else np.asarray(rows, dtype=np.intp)
+        self._columns = None if columns is None else list(columns)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def columns(self):
+        return self.base.columns if self._columns is None else pd.Index(self._columns)
+
+    def with_rows(self, rows):
+        return ResultView(self.base, rows, self._columns)
+
+    def _take(self, positions):
+        # 先取行再取列，只复制取出的行
+        frame = self.base.iloc[positions]
+        return frame if self._columns is None else frame[self._columns]
+
+    def _values(self, column):
+        return self.base[column].iloc[self.rows].reset_index(drop=True)
+
+    @traced('paging/filter')
+    def filter(self, column, value, mode="fuzzy"):
+        """按取值的字符串形式筛选，与数据查询的规则相同"""
+        index = ColumnIndex(self._values(column))
+        positions = index.contains(value) if mode == "fuzzy" else index.exact(value)
+        return self.with_rows(self.rows[positions])
+
+    @traced('paging/sort')
+    def sort(self, column, ascending=True):
+        # 稳定排序，缺失值排在最后
+        values = self._values(column)
+        try:
+            order = values.sort_values(ascending=ascending, kind='stable', na_position='last').index
+        except TypeError:
+            # xlsx、json 中常见同一列混有数字和文本，无法直接比较时按字符串形式排序
+            text = values.map(str, na_action='ignore').astype(object)
+            order = text.sort_values(ascending=ascending, kind='stable', na_position='last').index
+        return self.with_rows(self.rows[order.to_numpy()])
+
+    def pages(self, page_size):
+        return max(1, -(-len(self) // page_size))
+
+    def page(self, number, page_size):
+        start = (number - 1) * page_size
+        return self._take(self.rows[start:start + page_size])
+
+    def to_frame(self):
+        return self._take(self.rows)
+
+    def csv_chunks(self, chunk_rows=CSV_CHUNK_ROWS):
+        # 带 BOM，Excel 打开中文不乱码
+        if len(self) == 0:
+            yield self._take(self.rows[:0]).to_csv(index=False).encode('utf-8-sig')
+        for start in range(0, len(self), chunk_rows):
+            chunk = self._take(self.rows[start:start + chunk_rows])
+            yield chunk.to_csv(index=False, header=(start == 0)).encode('utf-8-sig' if start == 0 else 'utf-8')
+
+    def csv_bytes(self):
+        """整个结果的 CSV 内容。分块转换，不先复制出整个结果；内容本身仍一次性生成在内存中"""
+        return b"".join(self.csv_chunks())
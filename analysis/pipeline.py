@@ -0,0 +1,207 @@
+import argparse
+import hashlib
+import json
+
+from analysis.dtypes import convert_frame
+from analysis.instrument import span
+from analysis.loader import frame_nbytes, load_path
+
+
+def _dropna(df):
+    return df.dropna()
+
+
+def _fillna(df, column, value):
+    df = df.copy(deep=False)
+    df[column] = df[column].fillna(value)
+    return df
+
+
+def _drop_duplicates(df):
+    return df.drop_duplicates()
+
+
+def _standardize(df, columns):
+    df = df.copy(deep=False)
+    df[columns] = df[columns].apply(lambda x: (x - x.mean()) / x.std())
+    return df
+
+
+def _convert_types(df, dtypes):
+    return convert_frame(df, dtypes)
+
+
+# 可记录到流水线中的操作：名称 -> (函数, 页面上显示的说明)
+OPERATIONS = {
+    'dropna': (_dropna, "删除缺失值行"),
+    'fillna': (_fillna, "填充缺失值"),
+    'drop_duplicates': (_drop_duplicates, "删除重复行"),
+    'standardize': (_standardize, "标准化数据"),
+    'convert_types': (_convert_types, "修改数据类型"),
+}
+
+
+def changed_columns(step):
+    """步骤修改了哪些列；返回 None 表示行发生了变化，所有列都受影响"""
+    params = step['params']
+    if step['op'] == 'fillna':
+        return [params['column']]
+    if step['op'] == 'standardize':
+        return list(params['columns'])
+    if step['op'] == 'convert_types':
+        return list(params['dtypes'])
+    return None
+
+
+def owned_nbytes(df, step):
+    """步骤输出中新分配的字节数：只修改部分列时，其余列与上一步共用同一份数据"""
+    columns = changed_columns(step)
+    if columns is None:
+        return frame_nbytes(df)
+    return frame_nbytes(df[[c for c in columns if c in df.columns]])
+
+
+def describe_step(step):
+    label = OPERATIONS[step['op']][1]
+    if step['params']:
+        args = ", ".join(f"{k}={v}" for k, v in step['params'].items())
+        return f"{label}（{args}）"
+    return label
+
+
+class StepError(Exception):
+    """某一步执行失败。output 是失败之前最后一步的结果，index 是失败的步骤序号"""
+
+    def __init__(self, index, step, cause, output):
+        reason = f"找不到列 {cause.args[0]}" if isinstance(cause, KeyError) and cause.args else cause
+        super().__init__(f"第 {index + 1} 步（{describe_step(step)}）执行失败: {reason}")
+        self.index = index
+        self.step = step
+        self.cause = cause
+        self.output = output
+
+
+class Pipeline:
+    """按顺序记录的数据处理步骤。
+
+    每一步的输出都会缓存，修改第 N 步后只需从第 N 步开始重新执行。
+    """
+
+    def __init__(self, steps=None):
+        self.steps = []
+        # 与 steps 一一对应的 (指纹, 输出, 新分配的字节数) 缓存
+        self._outputs = []
+        for step in steps or []:
+            self.add(step['op'], **step['params'])
+
+    def __len__(self):
+        return len(self.steps)
+
+    def add(self, op, **params):
+        if op not in OPERATIONS:
+            raise ValueError(f"未知的操作: {op}")
+        self.steps.append({'op': op, 'params': params})
+
+    def remove(self, index):
+        del self.steps[index]
+        del self._outputs[index:]
+
+    def replace(self, index, op, **params):
+        if op not in OPERATIONS:
+            raise ValueError(f"未知的操作: {op}")
+        self.steps[index] = {'op': op, 'params': params}
+        del self._outputs[index:]
+
+    def clear(self):
+        self.steps = []
+        self._outputs = []
+
+    @property
+    def nbytes(self):
+        """缓存的各步输出占用的内存"""
+        return sum(output[2] for output in self._outputs)
+
+    def release(self):
+        """丢弃缓存的输出以释放内存，下次 run 时重新计算"""
+        self._outputs = []
+
+    def _fingerprints(self, base_key, upto=None):
+        # 每一步的指纹由上一步指纹和本步内容决定，任何一步变化都会使其后的指纹全部变化
+        fingerprint = str(base_key)
+        for step in self.steps[:upto]:
+            payload = fingerprint + json.dumps(step, sort_keys=True, ensure_ascii=False, default=str)
+            fingerprint = hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+            yield fingerprint
+
+    def fingerprint(self, base_key, upto=None):
+        """当前数据版本的标识：原始数据和全部步骤（或前 upto 步）共同决定"""
+        fingerprint = str(base_key)
+        for fingerprint in self._fingerprints(base_key, upto):
+            pass
+        return fingerprint
+
+    def lineage(self, base_key, upto=None):
+        """从原始数据开始每个版本的 (指纹, 相对上一版本修改的列)"""
+        versions = [(str(base_key), None)]
+        for step, fingerprint in zip(self.steps, self._fingerprints(base_key, upto)):
+            versions.append((fingerprint, changed_columns(step)))
+        return versions
+
+    def run(self, df, base_key):
+        """在 df 上执行所有步骤，复用指纹未变化的缓存结果。
+
+        某一步失败时抛出 StepError，之前各步的结果仍然缓存。
+        """
+        outputs = []
+        for i, (step, fingerprint) in enumerate(zip(self.steps, self._fingerprints(base_key))):
+            if i < len(self._outputs) and self._outputs[i][0] == fingerprint:
+                output = self._outputs[i]
+            else:
+                func = OPERATIONS[step['op']][0]
+                try:
+                    with span(f"pipeline/{step['op']}"):
+                        output_df = func(df, **step['params'])
+                except Exception as e:
+                    # 步骤记录在会话中，换了数据文件后可能引用不存在的列
+                    self._outputs = outputs
+                    raise StepError(i, step, e, df) from e
+                df = output_df
+                output = (fingerprint, df, owned_nbytes(df, step))
+                # 后面的缓存都基于旧的输入，不再可用
+                del self._outputs[i:]
+            df = output[1]
+            outputs.append(output)
+        self._outputs = outputs
+        return df
+
+    def apply(self, df):
+        """不使用缓存，直接在新数据上重放所有步骤"""
+        for step in self.steps:
+            df = OPERATIONS[step['op']][0](df, **step['params'])
+        return df
+
+    def to_json(self):
+        return json.dumps({'steps': self.steps}, ensure_ascii=False, indent=2, default=str)
+
+    @classmethod
+    def from_json(cls, text):
+        return cls(json.loads(text)['steps'])
+
+
+def replay_file(pipeline_path, input_path, output_path):
+    with open(pipeline_path, encoding='utf-8') as f:
+        pipeline = Pipeline.from_json(f.read())
+    _, df = load_path(input_path)
+    df = pipeline.apply(df)
+    df.to_csv(output_path, index=False)
+    return df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="在新文件上重放导出的数据处理流水线")
+    parser.add_argument('pipeline', help="导出的流水线 JSON 文件")
+    parser.add_argument('input', help="输入数据文件")
+    parser.add_argument('output', help="输出 CSV 文件")
+    args = parser.parse_args()
+    result = replay_file(args.pipeline, args.input, args.output)
+    print(f"已处理 {len(result)} 行，结果保存为 {args.output}")
@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+
+from analysis.cache import LRUCache
+from analysis.instrument import traced
+
+
+# 每次处理的行数，统计量逐块合并，内存只与块大小有关
+PROFILE_CHUNKSIZE = 1_000_000
+
+
+class TDigest:
+    """近似分位数（合并式 t-digest）。
+
+    不同取值较少时保存每个取值的个数，分位数是精确的；取值过多时压缩为约 compression 个质心，
+    两端的质心更小，因此极端分位数也比较准确。
+    """
+
+    def __init__(self, compression=200, max_exact=2000):
+        self.compression = compression
+        self.max_exact = max_exact
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.exact = True
+
+    def update(self, values):
+        self._add(np.asarray(values, dtype=np.float64), np.ones(len(values)))
+
+    def merge(self, other):
+        self.exact = self.exact and other.exact
+        self._add(other.means, other.weights)
+
+    def _add(self, means, weights):
+        # 相同取值先合并，离散数据不会被压缩
+        means, groups = np.unique(np.concatenate([self.means, means]), return_inverse=True)
+        weights = np.bincount(groups, weights=np.concatenate([self.weights, weights]))
+        if len(means) > self.max_exact:
+            self.exact = False
+        if self.exact:
+            self.means, self.weights = means, weights
+        else:
+            self._compress(means, weights)
+
+    def _compress(self, means, weights):
+        total = weights.sum()
+        # k1 尺度函数：按累计比例把质心分组，每组并为一个质心
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        groups = np.floor(k - k[0]).astype(np.int64)
+        new_weights = np.bincount(groups, weights=weights)
+        keep = new_weights > 0
+        self.means = np.bincount(groups, weights=means * weights)[keep] / new_weights[keep]
+        self.weights = new_weights[keep]
+
+    def quantile(self, qs):
+        qs = np.asarray(qs, dtype=np.float64)
+        if len(self.means) == 0:
+            return np.full(len(qs), np.nan)
+        cumulative = np.cumsum(self.weights)
+        if self.exact:
+            # 与 DataFrame.quantile 相同的线性插值
+            position = qs * (cumulative[-1] - 1)
+            low = np.floor(position)
+            lower = self.means[np.searchsorted(cumulative, low, side='right')]
+            upper = self.means[np.minimum(np.searchsorted(cumulative, low + 1, side='right'), len(self.means) - 1)]
+            return lower + (upper - lower) * (position - low)
+        positions = (cumulative - self.weights / 2) / cumulative[-1]
+        return np.interp(qs, positions, self.means)
+
+
+class HyperLogLog:
+    """近似不同值个数，使用 2^p 个寄存器，相对误差约 1.04 / sqrt(2^p)"""
+
+    def __init__(self, p=12):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, hashes):
+        if len(hashes) == 0:
+            return
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = (hashes & np.uint64((1 << (64 - self.p)) - 1)).astype(np.float64)
+        # 剩余位中第一个 1 出现的位置；frexp 的指数即二进制位数
+        rho = (64 - self.p) - np.frexp(rest)[1] + 1
+        np.maximum.at(self.registers, index, rho.astype(np.uint8))
+
+    def merge(self, other):
+        self.registers = np.maximum(self.registers, other.registers)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        # 基数较小时使用线性计数
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class ColumnProfile:
+    """一列的概要统计，可以逐块更新"""
+
+    def __init__(self, name, dtype):
+        self.name = name
+        self.dtype = dtype
+        self.numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        self.datetime = pd.api.types.is_datetime64_any_dtype(dtype)
+        self.rows = 0
+        self.count = 0
+        self.memory = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.digest = TDigest() if self.numeric else None
+        self.distinct = HyperLogLog()
+
+    def update(self, series):
+        self.rows += len(series)
+        self.memory += int(series.memory_usage(deep=True, index=False))
+        valid = series.dropna()
+        self.count += len(valid)
+        self.distinct.update(pd.util.hash_pandas_object(valid, index=False).to_numpy())
+        if len(valid) == 0:
+            return
+        if self.numeric:
+            values = valid.to_numpy(dtype=np.float64)
+            self._update_moments(values)
+            self.digest.update(values)
+        if self.numeric or self.datetime:
+            low, high = valid.min(), valid.max()
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+
+    def _update_moments(self, values):
+        # 块内的均值和平方和按 Welford/Chan 的方法与已有结果合并，数值稳定
+        n_b = len(values)
+        mean_b = values.mean()
+        m2_b = np.sum((values - mean_b) ** 2)
+        n_a = self.count - n_b
+        n = self.count
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * n_a * n_b / n
+
+    @property
+    def nulls(self):
+        return self.rows - self.count
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.count - 1)) if self.numeric and self.count > 1 else np.nan
+
+    def summary(self):
+        # 最小/最大值可能是数值或时间，统一按文本显示
+        quantiles = self.digest.quantile([0.25, 0.5, 0.75]) if self.numeric else [np.nan] * 3
+        return {
+            '类型': str(self.dtype),
+            '非空值': self.count,
+            '缺失值': self.nulls,
+            '缺失比例': self.nulls / self.rows if self.rows else np.nan,
+            '不同值(约)': min(self.distinct.count(), self.count),
+            '均值': self.mean if self.numeric and self.count else np.nan,
+            '标准差': self.std,
+            '最小值': '' if self.min is None else str(self.min),
+            '25%': quantiles[0],
+            '50%': quantiles[1],
+            '75%': quantiles[2],
+            '最大值': '' if self.max is None else str(self.max),
+            '内存(KB)': self.memory / 1024,
+        }
+
+
+@traced('profile/column')
+def profile_column(series, chunksize=PROFILE_CHUNKSIZE):
+    profile = ColumnProfile(series.name, series.dtype)
+    for start in range(0, len(series), chunksize):
+        profile.update(series.iloc[start:start + chunksize])
+    return profile
+
+
+def profile_table(profiles):
+    """各列的概要统计表，每行一列"""
+    if not profiles:
+        return pd.DataFrame()
+    return pd.DataFrame([profile.summary() for profile in profiles.values()], index=list(profiles))
+
+
+class ProfileEngine:
+    """按数据版本缓存各列的概要统计。
+
+    流水线步骤只修改了部分列（填充、标准化、类型转换）时，从最近一个已缓存的版本出发，
+    只重新统计被修改的列；删除行的步骤会使所有列重新统计。
+    """
+
+    def __init__(self, max_versions=16, budget=None):
+        self._profiles = LRUCache(max_versions, budget, 'profiles')
+
+    def profile(self, df, lineage):
+        """lineage 为 Pipeline.lineage() 的结果，最后一项是 df 的版本"""
+        version = lineage[-1][0]
+        cached = self._profiles.get(version)
+        if cached is not None:
+            return cached
+        profiles, dirty = {}, set()
+        for i in range(len(lineage) - 1, -1, -1):
+            previous = self._profiles.get(lineage[i][0])
+            if previous is not None:
+                profiles = previous
+                break
+            changed = lineage[i][1]
+            if changed is None:
+                break
+            dirty.update(changed)
+        result = {}
+        for column in df.columns:
+            old = profiles.get(column)
+            if old is None or column in dirty or old.dtype != df[column].dtype:
+                result[column] = profile_column(df[column])
+            else:
+                result[column] = old
+        self._profiles.put(version, result)
+        return result
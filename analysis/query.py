@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from analysis.instrument import traced
+from analysis.loader import frame_nbytes
+
+
+# 子串索引使用的 n-gram 长度，短于该长度的关键字直接扫描去重后的取值
+NGRAM = 3
+
+
+def _ngrams(text, n=NGRAM):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class ColumnIndex:
+    """一列数据的字符串形式，只转换一次，之后的查询都在去重后的取值上进行"""
+
+    def __init__(self, series):
+        # codes 为每一行对应的取值编号，缺失值为 -1，永远不会被匹配。
+        # 先对原始值去重，只把去重后的取值转换为字符串
+        codes, raw_uniques = pd.factorize(series)
+        # 不同的原始值可能转换为同一个字符串（如对象列中的 1 和 '1'），需要再合并一次
+        string_codes, uniques = pd.factorize(pd.Series(raw_uniques, dtype=object).astype(str))
+        self.codes = np.where(codes >= 0, string_codes[codes], -1)
+        self.uniques = pd.Index(uniques, dtype=object)
+        self._order = None
+        self._bounds = None
+        self._ngram_index = None
+
+    @property
+    def nbytes(self):
+        arrays = [self.codes, self._order, self._bounds]
+        if self._ngram_index is not None:
+            arrays.extend(self._ngram_index.values())
+        return (sum(array.nbytes for array in arrays if array is not None)
+                + int(self.uniques.memory_usage(deep=True)))
+
+    def build_hash_index(self):
+        # 按取值编号排序后的行号，每个取值对应其中连续的一段
+        if self._order is None:
+            self._order = np.argsort(self.codes, kind='stable')
+            sorted_codes = self.codes[self._order]
+            self._bounds = np.searchsorted(sorted_codes, np.arange(len(self.uniques) + 1))
+
+    def build_ngram_index(self):
+        if self._ngram_index is None:
+            postings = {}
+            for code, value in enumerate(self.uniques):
+                for gram in _ngrams(value):
+                    postings.setdefault(gram, []).append(code)
+            self._ngram_index = {gram: np.asarray(codes) for gram, codes in postings.items()}
+
+    def _rows_for_codes(self, codes):
+        if len(codes) == 0:
+            return np.empty(0, dtype=np.intp)
+        if self._order is not None:
+            parts = [self._order[self._bounds[c]:self._bounds[c + 1]] for c in codes]
+            return np.sort(np.concatenate(parts))
+        return np.flatnonzero(np.isin(self.codes, codes))
+
+    def exact_codes(self, value):
+        code = self.uniques.get_indexer([value])[0]
+        return np.empty(0, dtype=np.intp) if code < 0 else np.array([code])
+
+    def contains_codes(self, value):
+        if self._ngram_index is not None and len(value) >= NGRAM:
+            candidates = None
+            for gram in _ngrams(value):
+                posting = self._ngram_index.get(gram)
+                if posting is None:
+                    return np.empty(0, dtype=np.intp)
+                candidates = posting if candidates is None else np.intersect1d(candidates, posting)
+            # n-gram 只能筛掉不可能匹配的取值，候选值仍需逐一确认
+            return np.array([c for c in candidates if value in self.uniques[c]], dtype=np.intp)
+        matched = self.uniques.str.contains(value, regex=False)
+        return np.flatnonzero(matched)
+
+    def exact(self, value):
+        return self._rows_for_codes(self.exact_codes(value))
+
+    def contains(self, value):
+        return self._rows_for_codes(self.contains_codes(value))
+
+
+class QueryEngine:
+    """对一个数据集的模糊/精确查询，列的字符串形式和索引在多次查询间复用"""
+
+    def __init__(self, df, use_index=False):
+        self.df = df
+        self.use_index = use_index
+        self._columns = {}
+
+    @property
+    def nbytes(self):
+        """已建立的索引占用的内存，加上引擎引用的数据：缓存引擎会让这一版本的数据一直留在内存中"""
+        return frame_nbytes(self.df) + sum(index.nbytes for index in self._columns.values())
+
+    def column(self, name):
+        index = self._columns.get(name)
+        if index is None:
+            index = ColumnIndex(self.df[name])
+            self._columns[name] = index
+        if self.use_index:
+            index.build_hash_index()
+            index.build_ngram_index()
+        return index
+
+    @traced('query/search')
+    def search(self, value, column=None, mode="fuzzy"):
+        """返回匹配行的位置（升序），column 为 None 时在所有列中查询"""
+        columns = self.df.columns if column is None else [column]
+        rows = []
+        for name in columns:
+            index = self.column(name)
+            rows.append(index.contains(value) if mode == "fuzzy" else index.exact(value))
+        if not rows:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(np.concatenate(rows))
+
+    def query(self, value, column=None, mode="fuzzy"):
+        return self.df.iloc[self.search(value, column=column, mode=mode)]
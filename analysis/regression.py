@@ -0,0 +1,272 @@
+import numpy as np
+import pandas as pd
+
+from analysis.cache import LRUCache, frame_hash
+from analysis.instrument import traced
+
+
+# 拟合概率与 0 或 1 的差小于该值时视为饱和
+SATURATED = 1e-8
+
+
+def _term(name):
+    # 不是合法标识符的列名需要在公式中转义
+    return name if name.isidentifier() else f'Q("{name}")'
+
+
+def build_formula(y, xs):
+    return f"{_term(y)} ~ {' + '.join(_term(x) for x in xs)}"
+
+
+@traced('fit/glm')
+def fit_glm(df, formula, family='binomial'):
+    import statsmodels.api as sm
+    import statsmodels.formula.api as smf
+    if family != 'binomial':
+        raise ValueError(f"不支持的分布族: {family}")
+    return smf.glm(formula=formula, data=df, family=sm.families.Binomial()).fit()
+
+
+@traced('fit/ols')
+def fit_ols(df, y, xs):
+    """最小二乘线性回归，自动添加截距项，含缺失值的行不参与拟合"""
+    import statsmodels.api as sm
+    X = sm.add_constant(df[list(xs)].astype(float))
+    return sm.OLS(df[y].astype(float), X, missing='drop').fit()
+
+
+def coef_table(model):
+    """回归系数表，与 summary() 中的系数表相同，直接由拟合结果生成"""
+    conf = model.conf_int()
+    stat = 't' if getattr(model, 'use_t', False) else 'z'
+    table = pd.DataFrame({
+        'coef': model.params,
+        'std err': model.bse,
+        stat: model.tvalues,
+        f'P>|{stat}|': model.pvalues,
+        '[0.025': conf[0],
+        '0.975]': conf[1],
+    })
+    return table
+
+
+def model_stats(model):
+    """模型整体的拟合指标，statsmodels 的结果和分块拟合的结果都适用"""
+    names = {
+        'nobs': "样本量",
+        'df_model': "自变量个数",
+        'rsquared': "R²",
+        'rsquared_adj': "调整后 R²",
+        'fvalue': "F 统计量",
+        'f_pvalue': "F 检验 P 值",
+        'llf': "对数似然",
+        'aic': "AIC",
+    }
+    values = {label: getattr(model, name) for name, label in names.items() if hasattr(model, name)}
+    return pd.DataFrame({'值': pd.Series(values, dtype=float)})
+
+
+class StreamingResult:
+    """分块拟合的结果，提供与 statsmodels 结果相同的常用属性"""
+
+    def __init__(self, names, params, cov, nobs, use_t, df_resid):
+        from scipy import stats
+        self.params = pd.Series(params, index=names)
+        self.bse = pd.Series(np.sqrt(np.diag(cov)), index=names)
+        self.tvalues = self.params / self.bse
+        self.nobs = nobs
+        self.use_t = use_t
+        self.df_resid = df_resid
+        self.df_model = len(names) - 1
+        self.cov_params_ = cov
+        if use_t:
+            self.pvalues = pd.Series(2 * stats.t.sf(np.abs(self.tvalues), df_resid), index=names)
+            self._q = stats.t.ppf(0.975, df_resid)
+        else:
+            self.pvalues = pd.Series(2 * stats.norm.sf(np.abs(self.tvalues)), index=names)
+            self._q = stats.norm.ppf(0.975)
+
+    def conf_int(self):
+        return pd.DataFrame({0: self.params - self._q * self.bse, 1: self.params + self._q * self.bse})
+
+
+def _design(chunk, y, xs):
+    # 只取用到的列，并删除含缺失值的行
+    data = chunk[[y] + list(xs)].dropna().to_numpy(dtype=float)
+    X = np.empty((len(data), len(xs) + 1))
+    X[:, 0] = 1.0
+    X[:, 1:] = data[:, 1:]
+    return X, data[:, 0]
+
+
+@traced('fit/streaming_ols')
+def streaming_ols(chunks, y, xs):
+    """逐块累积 X'X 和 X'y 计算最小二乘，结果与一次性拟合相同，内存只与自变量个数有关。
+
+    chunks 为返回数据块迭代器的函数（见 analysis.chunked）。
+    均值很大的数据直接累积 X'X、y'y 会损失精度，因此各列先减去第一块的均值、除以第一块的标准差；
+    残差平方和由第二遍扫描直接计算，不由累积量相减得到。
+    """
+    from scipy import stats
+    p = len(xs) + 1
+    xtx = np.zeros((p, p))
+    xty = np.zeros(p)
+    y_sum = 0.0
+    n = 0
+    shift = None
+    for chunk in chunks():
+        X, target = _design(chunk, y, xs)
+        if len(target) == 0:
+            continue
+        if shift is None:
+            x_mean, y_mean = X[:, 1:].mean(axis=0), target.mean()
+            x_scale = X[:, 1:].std(axis=0)
+            x_scale[x_scale == 0] = 1.0
+            shift = (x_mean, x_scale, y_mean)
+        X[:, 1:] = (X[:, 1:] - x_mean) / x_scale
+        target = target - y_mean
+        xtx += X.T @ X
+        xty += X.T @ target
+        y_sum += target.sum()
+        n += len(target)
+    if shift is None:
+        raise ValueError("没有可用于拟合的数据（所选列全部含缺失值）")
+    xtx_inv = np.linalg.solve(xtx, np.eye(p))
+    beta_scaled = np.linalg.solve(xtx, xty)
+
+    # 第二遍：在同样平移后的坐标上计算残差平方和与总平方和
+    y_center = y_sum / n
+    sse = 0.0
+    sst = 0.0
+    for chunk in chunks():
+        X, target = _design(chunk, y, xs)
+        X[:, 1:] = (X[:, 1:] - x_mean) / x_scale
+        target = target - y_mean
+        sse += np.sum((target - X @ beta_scaled) ** 2)
+        sst += np.sum((target - y_center) ** 2)
+
+    # 换回原始坐标：X = X_scaled @ A，系数为 A⁻¹β，协方差为 A⁻¹ C A⁻ᵀ
+    a_inv = np.zeros((p, p))
+    a_inv[0, 0] = 1.0
+    a_inv[0, 1:] = -x_mean / x_scale
+    a_inv[1:, 1:] = np.diag(1.0 / x_scale)
+    beta = a_inv @ beta_scaled
+    beta[0] += y_mean
+    df_resid = n - p
+    cov = a_inv @ (sse / df_resid * xtx_inv) @ a_inv.T
+    result = StreamingResult(['Intercept'] + list(xs), beta, cov, n, True, df_resid)
+    result.rsquared = 1 - sse / sst
+    result.rsquared_adj = 1 - (1 - result.rsquared) * (n - 1) / df_resid
+    result.fvalue = (sst - sse) / result.df_model / (sse / df_resid) if result.df_model else np.nan
+    result.f_pvalue = stats.f.sf(result.fvalue, result.df_model, df_resid) if result.df_model else np.nan
+    return result
+
+
+@traced('fit/streaming_logit')
+def streaming_logit(chunks, y, xs, max_iter=25, tol=1e-8):
+    """分块计算的二分类 Logistic 回归（牛顿法 / IRLS）。
+
+    每次迭代扫描一遍数据，累积梯度和 Hessian 矩阵 X'WX，收敛后由 Hessian 的逆得到标准误，
+    结果与 statsmodels 的 GLM 一致，内存只与自变量个数有关。
+    在 max_iter 次迭代内没有收敛，或拟合概率全部趋于 0/1（数据完全可分）时抛出 ValueError，
+    此时的系数和标准误没有意义。
+    """
+    from scipy.special import expit
+    p = len(xs) + 1
+    beta = np.zeros(p)
+    converged = False
+    for _ in range(max_iter):
+        gradient = np.zeros(p)
+        hessian = np.zeros((p, p))
+        n = 0
+        for chunk in chunks():
+            X, target = _design(chunk, y, xs)
+            mu = expit(X @ beta)
+            gradient += X.T @ (target - mu)
+            hessian += (X * (mu * (1 - mu))[:, None]).T @ X
+            n += len(target)
+        step = np.linalg.solve(hessian, gradient)
+        beta = beta + step
+        if np.max(np.abs(step)) < tol:
+            converged = True
+            break
+    if not converged:
+        raise ValueError(f"Logistic 回归在 {max_iter} 次迭代内没有收敛，自变量可能把因变量完全分开（完全可分）")
+    # 用收敛后的系数重新计算 Hessian 和对数似然
+    hessian = np.zeros((p, p))
+    llf = 0.0
+    saturated = 0
+    for chunk in chunks():
+        X, target = _design(chunk, y, xs)
+        eta = X @ beta
+        mu = expit(eta)
+        hessian += (X * (mu * (1 - mu))[:, None]).T @ X
+        llf += np.sum(target * eta - np.logaddexp(0, eta))
+        saturated += np.count_nonzero((mu < SATURATED) | (mu > 1 - SATURATED))
+    if saturated == n:
+        raise ValueError("Logistic 回归的拟合概率全部为 0 或 1，数据完全可分，系数和标准误没有意义")
+    result = StreamingResult(['Intercept'] + list(xs), beta, np.linalg.inv(hessian), n, False, n - p)
+    result.llf = llf
+    result.aic = 2 * p - 2 * llf
+    return result
+
+
+def or_table(model, alpha=0.05):
+    """OR 值及其置信区间，按 OR 升序排列"""
+    from scipy.stats import norm
+    z = norm.ppf(1 - alpha / 2)
+    stat = pd.DataFrame({
+        'p': model.pvalues,
+        'OR': np.exp(model.params),
+        'OR_lower_ci': np.exp(model.params - z * model.bse),
+        'OR_upper_ci': np.exp(model.params + z * model.bse),
+    })
+    stat['sig'] = np.where(stat['p'] < alpha, "*", "no_sig")
+    return stat.sort_values('OR', ascending=True)
+
+
+def forest_plot(stat):
+    """由 OR 表绘制森林图（需要 plotnine）"""
+    from plotnine import (aes, element_text, geom_errorbarh, geom_point, geom_vline, ggplot, guide_legend,
+                          guides, labs, scale_color_manual, scale_y_discrete, theme, theme_minimal)
+    forest_df = stat.drop("Intercept", errors='ignore')\
+                    .reset_index()\
+                    .rename(columns={'index': 'independent_var'})\
+                    .sort_values('OR', ascending=False)
+    forest = ggplot(forest_df, aes(y='independent_var', x='OR')) \
+        + geom_point(aes(color='sig'), size=2) \
+        + geom_errorbarh(aes(xmin='OR_lower_ci', xmax='OR_upper_ci', color='sig'), height=0.1) \
+        + scale_color_manual(values=["red", "black"]) \
+        + scale_y_discrete(limits=forest_df["independent_var"]) \
+        + guides(color=guide_legend(reverse=True)) \
+        + labs(title='logistic Regression', x='OR', y='variable') \
+        + geom_vline(xintercept=1, linetype='dashed', color='black') \
+        + theme_minimal() \
+        + theme(plot_title=element_text(hjust=0.5))
+    return forest
+
+
+class ModelRegistry:
+    """缓存拟合好的模型，键为 (数据哈希, 公式, 分布族)。
+
+    回归系数表、OR 值表和森林图共用同一次拟合。
+    """
+
+    def __init__(self, max_models=16, budget=None):
+        self._models = LRUCache(max_models, budget, 'models')
+
+    def ols(self, df, y, xs, data_key=None):
+        if data_key is None:
+            data_key = frame_hash(df[[y] + list(xs)])
+        return self._models.get_or_create((data_key, build_formula(y, xs), 'ols'), lambda: fit_ols(df, y, xs))
+
+    def glm(self, df, formula, family='binomial', data_key=None):
+        if data_key is None:
+            data_key = frame_hash(df)
+        return self._models.get_or_create((data_key, formula, family), lambda: fit_glm(df, formula, family))
+
+    def streaming(self, chunks, kind, y, xs, data_key):
+        """分块拟合：kind 为 'ols' 或 'logit'，数据只能由调用方给出的 data_key 标识"""
+        fit = streaming_ols if kind == 'ols' else streaming_logit
+        key = (data_key, build_formula(y, xs), f"streaming-{kind}")
+        return self._models.get_or_create(key, lambda: fit(chunks, y, xs))
@@ -0,0 +1,64 @@
+import os
+
+import pandas as pd
+
+
+# 保存格式 -> 文件扩展名。列式格式会保存每一列的数据类型，重新打开时无需再次修改
+FORMATS = {
+    "CSV": ".csv",
+    "Parquet": ".parquet",
+    "Feather": ".feather",
+}
+
+COLUMNAR_EXTENSIONS = (".parquet", ".feather", ".arrow")
+
+
+def output_path(stem, fmt, directory=None):
+    """输出文件的路径；给出 directory 时放在该目录下，目录不存在会先创建"""
+    if directory is None:
+        return stem + FORMATS[fmt]
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, stem + FORMATS[fmt])
+
+
+def save_frame(df, path, index=False):
+    """按扩展名保存数据，返回写入的文件大小（字节）。
+
+    index 为 True 时保留行标签（如 JSON 文件的行名），读回后与原数据相同。
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        df.to_parquet(path, index=None if index else False)
+    elif ext in (".feather", ".arrow"):
+        if index:
+            import pyarrow as pa
+            import pyarrow.feather as feather
+            # 默认的整数索引只记在元数据中，其他索引保存为单独的列，读回时还原
+            feather.write_feather(pa.Table.from_pandas(df, preserve_index=None), path, compression="uncompressed")
+        else:
+            # DataFrame.to_feather 不能保存非默认索引
+            df.reset_index(drop=True).to_feather(path, compression="uncompressed")
+    else:
+        df.to_csv(path, index=index)
+    return os.path.getsize(path)
+
+
+def load_frame(path, memory_map=True):
+    """读取保存的数据，列式格式使用内存映射。
+
+    未压缩的 Feather 文件可以直接映射到内存，数值列转换为 DataFrame 时不需要复制。
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".feather", ".arrow"):
+        import pyarrow.feather as feather
+        table = feather.read_table(path, memory_map=memory_map)
+        return table.to_pandas(split_blocks=True)
+    elif ext == ".parquet":
+        return pd.read_parquet(path, memory_map=memory_map)
+    return pd.read_csv(path)
+
+
+def file_key(path):
+    """已保存文件的缓存键：路径、大小和修改时间，避免为计算哈希读取整个文件"""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from analysis.instrument import traced
+from analysis.loader import content_hash, frame_nbytes, read_table
+from analysis.storage import COLUMNAR_EXTENSIONS, file_key, load_frame, save_frame
+
+
+# 解析结果的落盘目录，可用环境变量 DATASET_STORE_DIR 指定
+STORE_ENV = 'DATASET_STORE_DIR'
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), 'web_code_datasets')
+
+
+class MemoryBudget:
+    """全局内存预算：登记各处持有的数据及其大小，超出上限时按最近最少使用顺序释放。
+
+    每个条目带一个 release 函数，被淘汰时调用，由持有者丢弃自己的引用。
+    """
+
+    def __init__(self, max_bytes=2 * 1024 ** 3):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def nbytes(self):
+        return sum(size for size, _ in self._items.values())
+
+    def charge(self, key, nbytes, release):
+        """登记或更新一个条目，返回被淘汰的条目的键"""
+        with self._lock:
+            self._items[key] = (nbytes, release)
+            self._items.move_to_end(key)
+            evicted = []
+            # 至少保留刚登记的条目，即使它本身超过上限
+            while len(self._items) > 1 and self.nbytes > self.max_bytes:
+                old_key, (_, old_release) = self._items.popitem(last=False)
+                evicted.append((old_key, old_release))
+        # release 可能要获取持有者自己的锁，放在预算的锁外面调用
+        for _, old_release in evicted:
+            old_release()
+        return [old_key for old_key, _ in evicted]
+
+    def touch(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+
+    def discard(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def usage(self):
+        """各条目的 (键, 字节数)，最近使用的在后"""
+        with self._lock:
+            return [(key, size) for key, (size, _) in self._items.items()]
+
+
+class DatasetStore:
+    """所有会话共享的只读数据集。
+
+    上传的文件按内容哈希只解析一次，写成未压缩的 Feather 文件后内存映射打开：
+    没有缺失值的数值列和文本列直接引用映射的页面，不占用进程自己的内存；
+    从内存中淘汰后再次打开只需重新映射，不必重新解析。
+    映射得到的数组是只读的，各会话在此基础上的修改依靠 pandas 的写时复制得到自己的列。
+    """
+
+    def __init__(self, budget=None, directory=None, max_disk_bytes=20 * 1024 ** 3):
+        self.budget = budget if budget is not None else MemoryBudget()
+        self.directory = directory or os.environ.get(STORE_ENV) or DEFAULT_DIRECTORY
+        self.max_disk_bytes = max_disk_bytes
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._frames
+
+    def __len__(self):
+        return len(self._frames)
+
+    def _spill_path(self, key):
+        name = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.directory, name + '.feather')
+
+    def _keep(self, key, df):
+        with self._lock:
+            self._frames[key] = df
+        self.budget.charge(('dataset', key), frame_nbytes(df), lambda: self._release(key))
+        return df
+
+    def _release(self, key):
+        with self._lock:
+            self._frames.pop(key, None)
+
+    def get(self, key):
+        """内存中没有时，如果之前落过盘，直接重新映射"""
+        with self._lock:
+            df = self._frames.get(key)
+        if df is not None:
+            self.budget.touch(('dataset', key))
+            return df
+        path = self._spill_path(key)
+        if os.path.exists(path):
+            try:
+                return self._keep(key, load_frame(path, memory_map=True))
+            except (ImportError, OSError, ValueError):
+                pass
+        return None
+
+    @traced('store/spill')
+    def _spill(self, key, df):
+        """写成 Feather 后映射回来，行标签一并保存；不能保存为 Feather 的数据（如混合类型的列）仍保存在内存中"""
+        path = self._spill_path(key)
+        # 先写临时文件再改名，多个进程同时落盘同一数据时不会读到写了一半的文件
+        # 保存格式由扩展名决定，临时文件也以 .feather 结尾
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.feather"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            save_frame(df, tmp, index=True)
+            os.replace(tmp, path)
+            mapped = load_frame(path, memory_map=True)
+        except (ImportError, OSError, TypeError, ValueError):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return df
+        self._trim_disk(keep=path)
+        return mapped
+
+    def _trim_disk(self, keep):
+        # 落盘文件超过上限时，先删除最久没有修改的；已映射的文件删除后映射仍然有效
+        try:
+            # 只统计已完成的文件，其他进程正在写的临时文件名中有多个点
+            entries = [entry for entry in os.scandir(self.directory)
+                       if entry.name.endswith('.feather') and entry.name.count('.') == 1]
+        except OSError:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_disk_bytes:
+                break
+            if entry.path == keep:
+                continue
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            total -= size
+
+    def load_bytes(self, data, name, engine="c", key=None):
+        """解析上传的文件内容，同一内容在所有会话中只解析一次。返回 (键, DataFrame)"""
+        if key is None:
+            key = content_hash(data)
+        # 不同引擎解析出的类型可能不同，因此引擎也是键的一部分
+        store_key = (key, engine)
+        df = self.get(store_key)
+        if df is None:
+            df = self._keep(store_key, self._spill(store_key, read_table(data, name, engine=engine)))
+        return key, df
+
+    def load_path(self, path, engine="c"):
+        # 服务器上的列式文件本身就可以映射，不再另外落盘
+        if os.path.splitext(path)[1].lower() in COLUMNAR_EXTENSIONS:
+            key = file_key(path)
+            with self._lock:
+                df = self._frames.get(key)
+            if df is None:
+                df = self._keep(key, load_frame(path, memory_map=True))
+            else:
+                self.budget.touch(('dataset', key))
+            return key, df
+        with open(path, "rb") as f:
+            data = f.read()
+        return self.load_bytes(data, os.path.basename(path), engine=engine)
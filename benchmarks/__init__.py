@@ -0,0 +1 @@
+# 性能测试脚本，在项目根目录下以 python -m benchmarks.<脚本名> 运行
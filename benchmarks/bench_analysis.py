@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from analysis.charts import PLOT_TYPES, build_figure
+from analysis.chunked import frame_chunks
+from analysis.clustering import METRICS, ClusteringEngine
+from analysis.decomposition import DecompositionEngine
+from analysis.dtypes import convert_frame, infer_dtypes
+from analysis.loader import CSV_ENGINES, has_pyarrow, load_path
+from analysis.pipeline import OPERATIONS
+from analysis.profile import profile_column
+from analysis.query import QueryEngine
+from analysis.regression import build_formula, fit_glm, fit_ols, streaming_logit, streaming_ols
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data_test')
+DATASETS = {
+    'train': 'train.csv',  # 混合类型，Age/Cabin 含缺失值
+    'nba': 'nba2021_per_game.csv',  # 以数值列为主
+}
+# 比较两次结果时，耗时超过上次的该倍数且至少多出 MIN_SLOWDOWN 秒视为性能退化
+REGRESSION_RATIO = 1.5
+MIN_SLOWDOWN = 0.05
+
+
+def synthesize(sample, rows, seed=0):
+    """按样本各列的分布生成 rows 行数据，缺失值比例与样本相同"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name in sample.columns:
+        values = sample[name].dropna()
+        drawn = values.to_numpy()[rng.integers(0, len(values), rows)]
+        if pd.api.types.is_float_dtype(values):
+            # 在原值附近抖动，避免大量重复值
+            drawn = drawn + rng.normal(0, values.std() * 0.01, rows)
+            column = pd.Series(drawn)
+        elif pd.api.types.is_numeric_dtype(values):
+            column = pd.Series(drawn)
+            if values.is_unique:
+                column = pd.Series(np.arange(1, rows + 1))
+        else:
+            column = pd.Series(drawn, dtype=str)
+            # 几乎每行都不同的文本列（姓名、票号）加上行号，保持高基数
+            if values.nunique() > 0.5 * len(values):
+                column = column + ' #' + pd.Series(np.arange(rows)).astype(str)
+        null_ratio = sample[name].isna().mean()
+        if null_ratio > 0:
+            column[rng.random(rows) < null_ratio] = np.nan
+        columns[name] = column
+    return pd.DataFrame(columns)
+
+
+def measure(func, memory=True):
+    """返回 (耗时, 峰值内存 MB, 结果)。
+
+    tracemalloc 会明显拖慢分配频繁的代码，因此耗时和内存分两次运行测量。
+    """
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    if not memory:
+        return seconds, None, result
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconds, peak / 1024 ** 2, result
+
+
+def choose_columns(df):
+    """按数据形状选出各项分析使用的列"""
+    # 排除编号列：每行都不同的整数列
+    numeric = [c for c in df.select_dtypes(include='number').columns
+               if not (pd.api.types.is_integer_dtype(df[c]) and df[c].is_unique)]
+    binary = [c for c in numeric if df[c].nunique() == 2]
+    text = df.select_dtypes(exclude='number').columns.tolist()
+    features = [c for c in numeric if c not in binary][:5]
+    labels = [c for c in text if df[c].nunique() <= 20]
+    sample = df[text[0]].dropna().iloc[0] if text else None
+    return {
+        'features': features,
+        'target': binary[0] if binary else None,
+        'ols_y': features[-1],
+        'ols_x': features[:-1],
+        'hue': labels[0] if labels else None,
+        'query_column': text[0] if text else None,
+        'exact_value': sample,
+        'fuzzy_value': sample[:3] if sample else None,
+    }
+
+
+def cases(df, path, spec):
+    """(名称, 函数) 列表，每个函数完成一项分析"""
+    features = spec['features']
+    model_df = df.dropna(subset=features)
+    if spec['target'] is None:
+        # 数值型数据没有二分类列时，以第一个特征是否高于中位数作为因变量
+        model_df = model_df.assign(_target=(model_df[features[0]] > model_df[features[0]].median()).astype(int))
+        target, logit_x = '_target', features[1:]
+    else:
+        target, logit_x = spec['target'], features
+    items = []
+    for engine in CSV_ENGINES:
+        if engine == 'pyarrow' and not has_pyarrow():
+            continue
+        items.append((f'load/{engine}', lambda engine=engine: load_path(path, engine=engine)))
+    items.append(('infer_types', lambda: infer_dtypes(df)))
+    items.append(('convert_types', lambda: convert_frame(df, infer_dtypes(df))))
+    items.append(('profile', lambda: {c: profile_column(df[c]) for c in df.columns}))
+    if spec['query_column'] is not None:
+        for use_index in (False, True):
+            for mode, value in (('fuzzy', spec['fuzzy_value']), ('exact', spec['exact_value'])):
+                name = f"query/{mode}{'/index' if use_index else ''}"
+                items.append((name, lambda mode=mode, value=value, use_index=use_index:
+                              QueryEngine(df, use_index=use_index).search(value, spec['query_column'], mode)))
+    items.append(('clean/dropna', lambda: OPERATIONS['dropna'][0](df)))
+    items.append(('clean/fillna', lambda: OPERATIONS['fillna'][0](df, features[0], 0)))
+    items.append(('clean/drop_duplicates', lambda: OPERATIONS['drop_duplicates'][0](df)))
+    items.append(('clean/standardize', lambda: OPERATIONS['standardize'][0](df, features)))
+    for plot_type in PLOT_TYPES:
+        items.append((f'chart/{plot_type}', lambda plot_type=plot_type:
+                      build_figure(df, plot_type, features[0], features[1], spec['hue'])[1]))
+    for metric in METRICS:
+        items.append((f'elbow/{metric}', lambda metric=metric:
+                      ClusteringEngine().elbow(model_df, features, range(1, 11), metric)))
+    items.append(('pca', lambda: DecompositionEngine().fit(model_df, features)))
+    items.append(('ols', lambda: fit_ols(model_df, spec['ols_y'], spec['ols_x'])))
+    items.append(('ols/streaming', lambda: streaming_ols(frame_chunks(model_df), spec['ols_y'], spec['ols_x'])))
+    items.append(('logit', lambda: fit_glm(model_df[[target] + logit_x].astype(float),
+                                           build_formula(target, logit_x))))
+    items.append(('logit/streaming', lambda: streaming_logit(frame_chunks(model_df), target, logit_x)))
+    return items
+
+
+def warm_up(sample, directory):
+    # 先在小数据上把每一项运行一次，statsmodels、sklearn 等的导入时间不计入结果
+    df = synthesize(sample, 1000)
+    path = os.path.join(directory, 'warm_up.csv')
+    df.to_csv(path, index=False)
+    for _, func in cases(df, path, choose_columns(df)):
+        try:
+            func()
+        except Exception:
+            pass
+
+
+def run(datasets, sizes, only=None, memory=True, seed=0):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name in datasets:
+            sample = pd.read_csv(os.path.join(DATA_DIR, DATASETS[name]))
+            warm_up(sample, directory)
+            for rows in sizes:
+                df = synthesize(sample, rows, seed)
+                path = os.path.join(directory, f"{name}_{rows}.csv")
+                df.to_csv(path, index=False)
+                spec = choose_columns(df)
+                for case, func in cases(df, path, spec):
+                    if only and not any(case.startswith(prefix) for prefix in only):
+                        continue
+                    record = {'dataset': name, 'rows': rows, 'case': case}
+                    try:
+                        seconds, peak, result = measure(func, memory)
+                        record.update(seconds=seconds, peak_mb=peak)
+                        if isinstance(result, dict) and 'payload_bytes' in result:
+                            record['payload_bytes'] = result['payload_bytes']
+                    except Exception as e:
+                        record['error'] = f"{type(e).__name__}: {e}"
+                    results.append(record)
+                    if 'error' in record:
+                        detail = record['error']
+                    else:
+                        detail = f"{record['seconds']:9.3f} s"
+                        if peak is not None:
+                            detail += f" {peak:9.1f} MB"
+                    print(f"{name:<6} {rows:>10} {case:<24} {detail}", flush=True)
+                os.remove(path)
+    return results
+
+
+def compare(results, baseline_path, ratio=REGRESSION_RATIO):
+    """与上一次的结果比较，返回耗时明显增加的项目"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['dataset'], r['rows'], r['case']): r for r in json.load(f)['results']}
+    slower = []
+    for record in results:
+        old = baseline.get((record['dataset'], record['rows'], record['case']))
+        if old and 'seconds' in old and 'seconds' in record \
+                and record['seconds'] > old['seconds'] * ratio and record['seconds'] - old['seconds'] > MIN_SLOWDOWN:
+            slower.append((record, old))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在不同数据量下测量各分析模块的耗时和峰值内存")
+    parser.add_argument('--datasets', nargs='+', choices=list(DATASETS), default=list(DATASETS))
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000], help="生成数据的行数")
+    parser.add_argument('--only', nargs='+', help="只运行名称以这些前缀开头的项目，如 load query elbow")
+    parser.add_argument('--no-memory', action='store_true', help="不测量峰值内存，总耗时减半")
+    parser.add_argument('--output', help="结果保存为 JSON 文件")
+    parser.add_argument('--compare', help="与之前保存的 JSON 结果比较")
+    args = parser.parse_args()
+
+    results = run(args.datasets, args.rows, args.only, memory=not args.no_memory)
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        slower = compare(results, args.compare)
+        for record, old in slower:
+            print(f"变慢: {record['dataset']} {record['rows']} {record['case']} "
+                  f"{old['seconds']:.3f} s -> {record['seconds']:.3f} s")
+        if slower:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在新的解释器中导入，测量冷启动时的导入耗时
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+# 用 Streamlit 自带的测试工具执行一次完整的脚本，再测量一次重跑
+APP_SNIPPET = """
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file('main.py', default_timeout=120).run()
+cold = time.perf_counter() - start
+start = time.perf_counter()
+at.run()
+print(cold, time.perf_counter() - start)
+"""
+
+
+def run_python(code):
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return [float(v) for v in output.stdout.split()]
+
+
+def import_time(module, repeat):
+    return min(run_python(IMPORT_SNIPPET.format(module=module))[0] for _ in range(repeat))
+
+
+def main():
+    import views
+
+    parser = argparse.ArgumentParser(description="测量应用启动和各模块的导入耗时")
+    parser.add_argument('--repeat', type=int, default=3, help="每项测量重复次数，取最小值")
+    parser.add_argument('--output', help="结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    results = {'imports': {}}
+    # 每次启动都会导入的部分
+    for module in ('views.common', 'views'):
+        results['imports'][module] = import_time(module, args.repeat)
+    # 各模块只在被选中时导入
+    for name, module in views.MODULES.items():
+        results['imports'][module] = import_time(module, args.repeat)
+
+    runs = [run_python(APP_SNIPPET) for _ in range(args.repeat)]
+    results['app_cold_start'] = min(cold for cold, _ in runs)
+    results['app_rerun'] = min(rerun for _, rerun in runs)
+
+    for module, seconds in results['imports'].items():
+        print(f"import {module:<24} {seconds:8.3f} s")
+    print(f"{'应用冷启动':<30} {results['app_cold_start']:8.3f} s")
+    print(f"{'应用重跑':<31} {results['app_rerun']:8.3f} s")
+    if args.output:
+        results['timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
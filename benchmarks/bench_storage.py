@@ -0,0 +1,65 @@
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from analysis.storage import load_frame, save_frame
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data_test')
+
+
+def scaled(name, factor):
+    df = pd.read_csv(os.path.join(DATA_DIR, name))
+    return pd.concat([df] * factor, ignore_index=True)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def bench(df, directory, label):
+    rows = []
+    for ext in ('.csv', '.parquet', '.feather'):
+        path = os.path.join(directory, label + ext)
+        write_time, size = timed(lambda: save_frame(df, path))
+        read_time, loaded = timed(lambda: load_frame(path))
+        # 类型是否在保存和读取后保持不变
+        dtypes_kept = all(str(a) == str(b) for a, b in zip(df.dtypes, loaded.dtypes))
+        rows.append({
+            'data': label, 'rows': len(df), 'format': ext[1:],
+            'size_mb': size / 1024 ** 2, 'write_s': write_time, 'read_s': read_time,
+            'dtypes_kept': dtypes_kept,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较 CSV 与 Parquet/Feather 的保存和读取速度")
+    parser.add_argument('--factors', type=int, nargs='+', default=[1, 100, 1000], help="数据放大倍数")
+    parser.add_argument('--output', help="结果另存为 CSV 文件")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('train.csv', 'nba2021_per_game.csv'):
+            for factor in args.factors:
+                df = scaled(name, factor)
+                # 模拟在数据类型页面修改后的数据：类别列和时间列
+                for column in df.select_dtypes(exclude='number').columns[:2]:
+                    df[column] = df[column].astype('category')
+                df['loaded_at'] = pd.Timestamp('2024-01-01')
+                results.extend(bench(df, directory, f"{os.path.splitext(name)[0]}_x{factor}"))
+
+    table = pd.DataFrame(results)
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    if args.output:
+        table.to_csv(args.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
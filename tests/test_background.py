@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+import pytest
+
+from analysis.background import JobExecutor
+from analysis.instrument import traced
+from analysis.store import MemoryBudget
+
+
+def _wait(job, timeout=10):
+    job._future.result(timeout=timeout)
+    return job
+
+
+def _blocking(job, event, value=1):
+    while not event.wait(0.01):
+        job.check()
+    return value
+
+
+@pytest.fixture
+def executor():
+    executor = JobExecutor(max_workers=2)
+    yield executor
+    executor.shutdown()
+
+
+def test_same_key_shares_one_job(executor):
+    event = threading.Event()
+    first = executor.submit('a', _blocking, event, key='k')
+    second = executor.submit('a', _blocking, event, key='k')
+    assert first is second
+    event.set()
+    assert _wait(first).status == 'done'
+    # 已完成的结果直接复用
+    assert executor.submit('a', _blocking, event, key='k') is first
+
+
+def test_cancel_waits_for_all_subscribers(executor):
+    event = threading.Event()
+    job = executor.submit('a', _blocking, event, key='k', subscriber='A')
+    executor.submit('a', _blocking, event, key='k', subscriber='B')
+    executor.cancel(job.id, 'A')
+    assert not job.cancel_requested
+    executor.cancel(job.id, 'B')
+    assert job.cancel_requested
+    assert _wait(job).status == 'cancelled'
+    # 已请求取消的任务不再复用
+    event.set()
+    again = executor.submit('a', _blocking, event, key='k', subscriber='C')
+    assert again is not job and _wait(again).status == 'done'
+
+
+def test_budget_forgets_evicted_job():
+    budget = MemoryBudget(max_bytes=1_000)
+    executor = JobExecutor(max_workers=1, budget=budget)
+    try:
+        job = _wait(executor.submit('a', lambda job: np.zeros(100), key='k'))
+        assert ('job', job.id) in budget
+        budget.charge('other', 800, lambda: None)
+        assert executor.get(job.id) is None
+        assert executor.submit('a', lambda job: np.zeros(100), key='k') is not job
+    finally:
+        executor.shutdown()
+
+
+def test_job_records_spans(executor):
+    @traced('fit/test')
+    def fit():
+        return 1
+
+    job = _wait(executor.submit('a', lambda job: fit()))
+    assert [span['name'] for span in job.spans] == ['fit/test']
@@ -0,0 +1,36 @@
+import numpy as np
+
+from analysis.charts import lttb, minmax
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500)
+    y[4_321] = 50.0
+    selected = lttb(x, y, 200)
+    assert len(selected) == 200
+    assert selected[0] == 0 and selected[-1] == len(x) - 1
+    assert np.all(np.diff(selected) > 0)
+    assert 4_321 in selected
+
+
+def test_lttb_returns_all_points_when_small():
+    x = np.arange(10, dtype=float)
+    np.testing.assert_array_equal(lttb(x, x, 20), np.arange(10))
+
+
+def test_minmax_keeps_extremes_of_each_bucket():
+    y = np.random.default_rng(0).normal(size=10_001)
+    n_out = 100
+    selected = minmax(y, n_out)
+    assert len(selected) <= n_out and np.all(np.diff(selected) > 0)
+    assert y.argmax() in selected and y.argmin() in selected
+    buckets = np.arange(len(y)) * (n_out // 2) // len(y)
+    for bucket in np.unique(buckets):
+        members = np.flatnonzero(buckets == bucket)
+        assert members[y[members].argmax()] in selected
+        assert members[y[members].argmin()] in selected
+
+
+def test_minmax_returns_all_points_when_small():
+    np.testing.assert_array_equal(minmax(np.arange(5.0), 10), np.arange(5))
@@ -0,0 +1,36 @@
+import numpy as np
+
+from analysis.clustering import KMedians, fit_clusters
+
+
+def _blobs(seed=0):
+    rng = np.random.default_rng(seed)
+    centers = np.array([[0.0, 0.0], [10.0, 10.0], [-10.0, 10.0]])
+    X = np.concatenate([center + rng.laplace(size=(300, 2)) for center in centers])
+    return X, np.repeat(np.arange(3), 300)
+
+
+def test_kmedians_recovers_separated_clusters():
+    X, truth = _blobs()
+    model = KMedians(n_clusters=3).fit(X)
+    # 每个真实的簇都被分到同一个标签中，且三个簇的标签不同
+    mapping = {t: np.unique(model.labels_[truth == t]) for t in range(3)}
+    assert all(len(labels) == 1 for labels in mapping.values())
+    assert len({labels[0] for labels in mapping.values()}) == 3
+
+
+def test_kmedians_centers_are_medians_and_inertia_is_l1():
+    X, _ = _blobs(1)
+    model = KMedians(n_clusters=3).fit(X)
+    for j in range(3):
+        np.testing.assert_allclose(model.cluster_centers_[j], np.median(X[model.labels_ == j], axis=0))
+    inertia = np.abs(X - model.cluster_centers_[model.labels_]).sum()
+    assert abs(model.inertia_ - inertia) < 1e-9 * inertia
+    np.testing.assert_array_equal(model.predict(X), model.labels_)
+
+
+def test_fit_clusters_manhattan_uses_kmedians():
+    X, _ = _blobs(2)
+    result = fit_clusters(X, 3, "曼哈顿距离")
+    assert result.method == "K-medians" and result.labels.dtype == np.int32
+    assert len(np.unique(result.labels)) == 3
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.pipeline import Pipeline, StepError
+
+
+def _frame():
+    return pd.DataFrame({'a': [1.0, np.nan, 3.0, 3.0], 'b': ['x', 'y', 'z', 'z']})
+
+
+def test_run_reuses_cached_outputs():
+    df = _frame()
+    pipeline = Pipeline()
+    pipeline.add('fillna', column='a', value=0)
+    first = pipeline.run(df, 'key')
+    assert pipeline.run(df, 'key') is first
+    # 新增的步骤从缓存的结果继续执行
+    pipeline.add('drop_duplicates')
+    result = pipeline.run(df, 'key')
+    assert pipeline._outputs[0][1] is first
+    assert result['a'].tolist() == [1.0, 0.0, 3.0]
+
+
+def test_changed_step_invalidates_later_outputs():
+    df = _frame()
+    pipeline = Pipeline()
+    pipeline.add('fillna', column='a', value=0)
+    pipeline.add('drop_duplicates')
+    pipeline.run(df, 'key')
+    pipeline.replace(0, 'fillna', column='a', value=3)
+    assert pipeline.run(df, 'key')['a'].tolist() == [1.0, 3.0, 3.0]
+    # 原始数据的键变化时全部重新执行
+    assert pipeline.run(df.head(2), 'other')['a'].tolist() == [1.0, 3.0]
+
+
+def test_step_error_names_step_and_keeps_earlier_output():
+    df = _frame()
+    pipeline = Pipeline()
+    pipeline.add('drop_duplicates')
+    pipeline.add('fillna', column='Nope', value=0)
+    with pytest.raises(StepError) as info:
+        pipeline.run(df, 'key')
+    error = info.value
+    assert str(error).startswith("第 2 步（填充缺失值（column=Nope, value=0））执行失败: 找不到列 Nope")
+    assert error.index == 1
+    assert len(error.output) == 3
+    assert len(pipeline._outputs) == 1 and pipeline.nbytes > 0
+
+
+def test_fingerprint_depends_on_steps_and_limit():
+    pipeline = Pipeline()
+    pipeline.add('dropna')
+    pipeline.add('drop_duplicates')
+    full = pipeline.fingerprint('key')
+    assert pipeline.fingerprint('key', 1) != full
+    assert pipeline.fingerprint('key', 0) == 'key'
+    assert [version for version, _ in pipeline.lineage('key', 1)] == ['key', pipeline.fingerprint('key', 1)]
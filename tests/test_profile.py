@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from analysis.profile import HyperLogLog, TDigest, profile_column
+
+
+QS = [0.01, 0.25, 0.5, 0.75, 0.99]
+
+
+def test_tdigest_exact_for_few_distinct_values():
+    values = np.random.default_rng(0).integers(0, 50, 10_000).astype(float)
+    digest = TDigest()
+    for chunk in np.array_split(values, 7):
+        digest.update(chunk)
+    assert digest.exact
+    np.testing.assert_allclose(digest.quantile(QS), pd.Series(values).quantile(QS).to_numpy())
+
+
+def test_tdigest_approximates_continuous_values():
+    values = np.random.default_rng(1).lognormal(size=200_000)
+    parts = []
+    for chunk in np.array_split(values, 5):
+        part = TDigest()
+        part.update(chunk)
+        parts.append(part)
+    digest = parts[0]
+    for part in parts[1:]:
+        digest.merge(part)
+    assert not digest.exact
+    # 误差按排名衡量：估计值在全部数据中的排名与目标分位数相差不到 0.5%
+    ranks = np.searchsorted(np.sort(values), digest.quantile(QS)) / len(values)
+    np.testing.assert_allclose(ranks, QS, atol=0.005)
+
+
+def _hashes(values):
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+
+def test_hyperloglog_counts_distinct_values():
+    rng = np.random.default_rng(2)
+    values = rng.integers(0, 50_000, 200_000)
+    hll = HyperLogLog()
+    other = HyperLogLog()
+    hll.update(_hashes(values[:100_000]))
+    other.update(_hashes(values[100_000:]))
+    hll.merge(other)
+    expected = pd.Series(values).nunique()
+    # p=12 时相对误差约 1.6%，取三倍
+    assert abs(hll.count() - expected) / expected < 0.05
+
+
+def test_hyperloglog_small_counts():
+    hll = HyperLogLog()
+    hll.update(_hashes(['a', 'b', 'c', 'a']))
+    assert hll.count() == 3
+
+
+def test_profile_column_matches_pandas():
+    series = pd.Series(np.random.default_rng(3).normal(size=10_000))
+    series[::10] = np.nan
+    profile = profile_column(series, chunksize=3_000)
+    summary = profile.summary()
+    assert summary['非空值'] == series.count() and summary['缺失值'] == series.isna().sum()
+    assert abs(summary['均值'] - series.mean()) < 1e-12
+    assert abs(summary['标准差'] - series.std()) < 1e-12
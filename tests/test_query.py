@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.query import QueryEngine
+
+
+def _frame():
+    return pd.DataFrame({
+        'name': ['Smith, Mr. John', 'Brown, Mrs. Ann', None, 'Lee, Mr. Li', 'Smith, Miss. Amy'],
+        'age': [22.0, 38.0, np.nan, 3.0, 22.0],
+        'class': [3, 1, 3, 2, 1],
+        'port': ['S', 'C', 'S', None, 'Q'],
+    })
+
+
+# 原来逐行 apply 的写法，作为对照；关键字中没有正则表达式的特殊字符，也不是 'nan'
+def _old_fuzzy(df, value):
+    return np.flatnonzero(df.apply(lambda row: row.astype(str).str.contains(value, na=False).any(), axis=1))
+
+
+def _old_exact(df, value):
+    return np.flatnonzero(df.apply(lambda row: row.astype(str).eq(value).any(), axis=1))
+
+
+@pytest.mark.parametrize('use_index', [False, True])
+@pytest.mark.parametrize('value', ['Mr', 'Smith', '22', '3', 'S', 'Miss. Amy', 'zzz'])
+def test_fuzzy_matches_row_apply(use_index, value):
+    df = _frame()
+    engine = QueryEngine(df, use_index=use_index)
+    np.testing.assert_array_equal(engine.search(value), _old_fuzzy(df, value))
+
+
+@pytest.mark.parametrize('use_index', [False, True])
+@pytest.mark.parametrize('value', ['22.0', '3', 'S', 'Lee, Mr. Li', '22'])
+def test_exact_matches_row_apply(use_index, value):
+    df = _frame()
+    engine = QueryEngine(df, use_index=use_index)
+    np.testing.assert_array_equal(engine.search(value, mode='exact'), _old_exact(df, value))
+
+
+@pytest.mark.parametrize('use_index', [False, True])
+def test_single_column_and_missing_values(use_index):
+    df = _frame()
+    engine = QueryEngine(df, use_index=use_index)
+    np.testing.assert_array_equal(engine.search('Mr', column='name'), [0, 1, 3])
+    np.testing.assert_array_equal(engine.search('S', column='port', mode='exact'), [0, 2])
+    # 缺失值不会被匹配
+    assert len(engine.search('None', column='name')) == 0
+    assert engine.query('Smith', column='name').index.tolist() == [0, 4]
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+import statsmodels.formula.api as smf
+
+from analysis.chunked import frame_chunks
+from analysis.regression import streaming_logit, streaming_ols
+
+
+def _compare(df, y, xs, chunksize=30_000):
+    expected = sm.OLS(df[y], sm.add_constant(df[xs])).fit()
+    result = streaming_ols(frame_chunks(df, chunksize), y, xs)
+    # 系数的差异相对其标准误可以忽略（或只是浮点舍入）
+    params, expected_params = result.params.to_numpy(), expected.params.to_numpy()
+    assert np.all(np.abs(params - expected_params) <= 1e-3 * expected.bse.to_numpy() + 1e-12 * np.abs(expected_params))
+    np.testing.assert_allclose(result.bse.to_numpy(), expected.bse.to_numpy(), rtol=1e-6)
+    assert abs(result.rsquared - expected.rsquared) < 1e-9
+    assert abs(result.fvalue - expected.fvalue) / expected.fvalue < 1e-6
+
+
+def test_streaming_ols_matches_statsmodels():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(50_000, 2))
+    df = pd.DataFrame({'a': x[:, 0], 'b': x[:, 1], 'y': 1 + 2 * x[:, 0] - x[:, 1] + rng.normal(size=50_000)})
+    _compare(df, 'y', ['a', 'b'])
+
+
+def test_streaming_ols_large_offset():
+    # 因变量均值很大、残差很小时，直接累积 y'y 会得到负的残差平方和
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=200_000)
+    df = pd.DataFrame({'x': x, 'y': 1e7 + 2 * x + rng.normal(0, 0.01, 200_000)})
+    _compare(df, 'y', ['x'])
+
+
+def test_streaming_ols_large_regressor():
+    rng = np.random.default_rng(2)
+    x = 1e6 + rng.normal(size=200_000)
+    y = 3 + 0.5 * x + rng.normal(size=200_000)
+    df = pd.DataFrame({'x': x, 'y': y})
+    _compare(df, 'y', ['x'])
+    # 与扩展精度下按中心化公式算出的系数比较，直接对 X'X 求解的截距误差约为 1e-9
+    x_mean, y_mean = x.astype(np.longdouble).mean(), y.astype(np.longdouble).mean()
+    dx = x.astype(np.longdouble) - x_mean
+    slope = (dx * (y - y_mean)).sum() / (dx * dx).sum()
+    result = streaming_ols(frame_chunks(df, 30_000), 'y', ['x'])
+    np.testing.assert_allclose(result.params.to_numpy(), [float(y_mean - slope * x_mean), float(slope)], rtol=1e-12)
+
+
+def test_streaming_logit_matches_glm():
+    rng = np.random.default_rng(3)
+    x = rng.normal(size=(50_000, 2))
+    p = 1 / (1 + np.exp(-(0.5 + 1.5 * x[:, 0] - x[:, 1])))
+    df = pd.DataFrame({'a': x[:, 0], 'b': x[:, 1], 'y': (rng.random(50_000) < p).astype(float)})
+    expected = smf.glm('y ~ a + b', df, family=sm.families.Binomial()).fit()
+    result = streaming_logit(frame_chunks(df, 20_000), 'y', ['a', 'b'])
+    np.testing.assert_allclose(result.params.to_numpy(), expected.params.to_numpy(), rtol=1e-8)
+    np.testing.assert_allclose(result.bse.to_numpy(), expected.bse.to_numpy(), rtol=1e-6)
+    assert abs(result.llf - expected.llf) < 1e-6
+
+
+def test_streaming_logit_rejects_separated_data():
+    # 完全可分时牛顿法不会收敛，不能把发散的系数当作结果返回
+    x = np.linspace(-1, 1, 1_000)
+    df = pd.DataFrame({'x': x, 'y': (x > 0).astype(float)})
+    with pytest.raises(ValueError):
+        streaming_logit(frame_chunks(df, 300), 'y', ['x'])
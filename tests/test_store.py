@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+
+from analysis.cache import LRUCache
+from analysis.store import DatasetStore, MemoryBudget
+
+
+def test_budget_releases_least_recently_used():
+    budget = MemoryBudget(max_bytes=250)
+    released = []
+    for key in 'abc':
+        budget.charge(key, 100, lambda key=key: released.append(key))
+    assert released == ['a']
+    budget.touch('b')
+    evicted = budget.charge('d', 100, lambda: released.append('d'))
+    # 'b' 刚被访问过，先淘汰 'c'
+    assert evicted == ['c'] and released == ['a', 'c']
+    assert [key for key, _ in budget.usage()] == ['b', 'd']
+
+
+def test_budget_keeps_newest_item_even_if_too_large():
+    budget = MemoryBudget(max_bytes=100)
+    budget.charge('small', 50, lambda: None)
+    assert budget.charge('huge', 1_000, lambda: None) == ['small']
+    assert 'huge' in budget and budget.nbytes == 1_000
+
+
+def test_cache_entries_evicted_by_budget():
+    budget = MemoryBudget(max_bytes=2_000)
+    cache = LRUCache(10, budget, 'test')
+    for i in range(4):
+        cache.put(i, np.zeros(100))
+    # 每个条目 800 字节，预算只能容纳两个
+    assert len(cache) == 2 and 0 not in cache and 1 not in cache
+    assert budget.nbytes == 1_600
+
+
+def test_cache_count_eviction_and_clear_update_budget():
+    budget = MemoryBudget()
+    cache = LRUCache(2, budget, 'test')
+    for i in range(3):
+        cache.put(i, np.zeros(10))
+    assert [key for key, _ in budget.usage()] == [('cache', 'test', 1), ('cache', 'test', 2)]
+    cache.clear()
+    assert len(budget) == 0
+
+
+def test_cache_release_keeps_replaced_value():
+    budget = MemoryBudget(max_bytes=1_000)
+    cache = LRUCache(10, budget, 'test')
+    cache.put('a', np.zeros(100))
+    cache.put('a', np.zeros(10))
+    # 旧值的 release 不能删掉替换后的新值
+    cache._release('a', None)
+    assert cache.get('a') is not None
+
+
+def test_cache_resize_charges_grown_entry():
+    budget = MemoryBudget()
+    cache = LRUCache(10, budget, 'test')
+    value = {'rows': np.zeros(10)}
+    cache.put('a', value)
+    value['index'] = np.zeros(100)
+    cache.resize('a')
+    assert budget.nbytes == 880
+
+
+def test_spill_keeps_row_labels(tmp_path):
+    store = DatasetStore(MemoryBudget(), directory=str(tmp_path))
+    data = json.dumps({'a': {'r1': 1, 'r2': 2}, 'b': {'r1': 'x', 'r2': 'y'}}).encode()
+    key, df = store.load_bytes(data, 'data.json')
+    assert df.index.tolist() == ['r1', 'r2']
+    # 从内存中淘汰后重新映射落盘的文件
+    store._release((key, 'c'))
+    assert store.get((key, 'c')).index.tolist() == ['r1', 'r2']
@@ -0,0 +1,30 @@
+import importlib
+
+import streamlit as st
+
+
+# 模块名 -> 实现该模块的文件。只有被选中的模块才会导入，sklearn、statsmodels 等依赖随之按需加载
+MODULES = {
+    "数据类型确认与修改": "views.type_fix",
+    "数据查询": "views.query",
+    "数据预处理": "views.preprocessing",
+    "数据可视化": "views.visualization",
+    "无监督学习": "views.unsupervised",
+    "线性模型": "views.linear_models",
+    "大文件分块处理": "views.chunked",
+}
+
+# 这些模块自己分块读取文件，不需要事先把整个文件载入内存
+STREAMING_MODULES = {"大文件分块处理"}
+
+
+def load(name):
+    return importlib.import_module(MODULES[name])
+
+
+def render(name, ctx):
+    """只执行当前选中的模块"""
+    if name not in STREAMING_MODULES and not ctx.has_data:
+        st.info("请先在侧边栏上传数据文件")
+        return
+    load(name).render(ctx)
@@ -0,0 +1,133 @@
+import os
+
+import streamlit as st
+
+from analysis.background import JobCancelled
+from analysis.chunked import (DEFAULT_CHUNKSIZE, checked_chunks, csv_source, processed_chunks, read_header,
+                              run_chunked, stream_describe)
+from analysis.pipeline import describe_step
+from analysis.regression import coef_table, model_stats, or_table
+from analysis.storage import file_key
+from views.common import (current_job, get_model_registry, get_pipeline, server_path, session_dir, show_job, submit_job,
+                          upload_key)
+
+
+def _regression_job(job, registry, chunks, steps, kind, dependent, independent, data_key):
+    job.report(message="正在逐块拟合")
+    return registry.streaming(checked_chunks(processed_chunks(chunks, steps), job.check), kind, dependent,
+                              independent, data_key)
+
+
+def _save_job(job, chunks, steps, output_file):
+    try:
+        rows = run_chunked(chunks, steps, output_file,
+                           on_chunk=lambda rows: job.report(message=f"已写出 {rows} 行"))
+    except JobCancelled:
+        # 取消后不留下不完整的输出文件
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        raise
+    return rows, output_file
+
+
+def render(ctx):
+    st.header('🧱 大文件分块处理')
+    st.markdown("""
+        当文件大于内存时，可以分块读取 CSV 文件，逐块执行处理步骤并直接写入输出文件：
+        - 处理步骤与侧边栏 **处理步骤** 中记录的相同，也可以导入之前导出的步骤
+        - 删除重复行通过每一行的哈希值判断，标准化会先扫描一遍数据计算均值和标准差
+        - 描述统计逐块累积，分位数由随机样本近似
+    """)
+
+    # 服务器上的大文件可以直接填写路径，避免通过浏览器上传；只能读取本会话的输出目录或数据目录中的文件
+    local_path = st.text_input("服务器上的 CSV 文件路径（可选，优先于上传的文件）", "")
+    source = None
+    if local_path:
+        try:
+            source = server_path(local_path)
+            if not os.path.isfile(source):
+                raise ValueError(f"文件不存在: {local_path}")
+        except ValueError as e:
+            st.error(f"打开文件时出错: {e}")
+    elif ctx.uploaded_file is not None:
+        source = ctx.uploaded_file.getvalue()
+
+    if source is None:
+        if not local_path:
+            st.info("请上传文件或填写文件路径")
+    else:
+        chunksize = st.number_input("每块行数", min_value=1000, value=DEFAULT_CHUNKSIZE, step=10000)
+        chunks = csv_source(source, chunksize=chunksize)
+        pipeline = get_pipeline()
+
+        st.subheader('数据预览')
+        try:
+            header = read_header(source)
+        except (OSError, ValueError) as e:
+            st.error(f"读取 CSV 文件时出错: {e}")
+            return
+        st.write(header.head(10))
+
+        # 添加处理步骤
+        st.subheader('添加处理步骤')
+        clean_option = st.selectbox("清洗选项", ["删除缺失值行", "填充缺失值", "删除重复行", "标准化数据"])
+        if clean_option == "删除缺失值行" and st.button("添加步骤"):
+            pipeline.add('dropna')
+        elif clean_option == "填充缺失值":
+            fill_column = st.selectbox("选择要填充缺失值的列", options=header.columns)
+            fill_value = st.text_input("填充值", "")
+            if st.button("添加步骤") and fill_value:
+                pipeline.add('fillna', column=fill_column, value=fill_value)
+        elif clean_option == "删除重复行" and st.button("添加步骤"):
+            pipeline.add('drop_duplicates')
+        elif clean_option == "标准化数据":
+            numeric_columns = header.select_dtypes(include=['float64']).columns.tolist()
+            selected_columns = st.multiselect("选择需要标准化的列", numeric_columns)
+            if selected_columns and st.button("添加步骤"):
+                pipeline.add('standardize', columns=selected_columns)
+
+        st.write("当前处理步骤：")
+        for i, step in enumerate(pipeline.steps):
+            st.write(f"{i + 1}. {describe_step(step)}")
+
+        if st.button("分块计算描述统计"):
+            try:
+                with st.spinner("正在逐块计算..."):
+                    st.write(stream_describe(chunks, pipeline.steps))
+            except Exception as e:
+                st.error(f"计算描述统计时出错: {e}")
+
+        # 分块回归：数据不需要一次载入内存
+        st.subheader('分块回归')
+        numeric_columns = header.select_dtypes(include='number').columns.tolist()
+        regression_option = st.selectbox("选择模型", ["单/多元线性回归", "二分类Logistic回归"])
+        dependent = st.selectbox("选择因变量", numeric_columns)
+        independent = st.multiselect("选择自变量", [c for c in numeric_columns if c != dependent])
+        kind = 'ols' if regression_option == "单/多元线性回归" else 'logit'
+        regression_key = None
+        if independent:
+            source_key = file_key(local_path) if local_path else upload_key(ctx.uploaded_file)
+            data_key = pipeline.fingerprint(source_key)
+            regression_key = ('chunked', kind, data_key, dependent, tuple(independent))
+        if independent and st.button("执行分块回归"):
+            submit_job('chunked_regression', "分块回归", _regression_job, get_model_registry(), chunks,
+                       list(pipeline.steps), kind, dependent, independent, data_key, key=regression_key)
+        job = current_job('chunked_regression', regression_key)
+        if regression_key is not None and job is not None \
+                and show_job('chunked_regression', job, error_label="分块回归时出错"):
+            st.write(coef_table(job.result))
+            st.write(model_stats(job.result))
+            if kind == 'logit':
+                st.write(or_table(job.result))
+
+        # 只能写入当前会话的输出目录，不能指定服务器上的任意路径
+        output_name = os.path.basename(st.text_input("输出文件名", "modified_data.csv").strip())
+        if os.path.splitext(output_name)[1].lower() != ".csv":
+            output_name += ".csv"
+        if st.button("分块执行并保存"):
+            output_file = os.path.join(session_dir(), output_name)
+            submit_job('chunked_save', "分块处理", _save_job, chunks, list(pipeline.steps), output_file)
+        job = current_job('chunked_save')
+        if job is not None and show_job('chunked_save', job, error_label="分块处理时出错"):
+            rows, output_file = job.result
+            st.success(f"✅ 已处理 {rows} 行，数据已保存为 **{output_file}**")
@@ -0,0 +1,338 @@
+import os
+import uuid
+import weakref
+
+import streamlit as st
+
+from analysis.instrument import attach, span
+from analysis.loader import content_hash
+from analysis.pipeline import Pipeline, StepError
+from analysis.storage import FORMATS, output_path, save_frame
+from analysis.store import DatasetStore, MemoryBudget
+
+
+# 全局内存上限（MB）、各会话输出文件的根目录和允许打开的服务器数据目录，可用环境变量修改
+MEMORY_BUDGET_ENV = 'MEMORY_BUDGET_MB'
+OUTPUT_DIR_ENV = 'OUTPUT_DIR'
+DATA_ROOT_ENV = 'DATA_ROOT'
+
+
+# 所有会话共用的内存预算：共享的数据集和各会话流水线的中间结果都计入其中
+@st.cache_resource
+def get_memory_budget():
+    return MemoryBudget(max_bytes=int(os.environ.get(MEMORY_BUDGET_ENV, 2048)) * 1024 ** 2)
+
+
+# 所有会话共享的只读数据集，同一文件内容只解析一次
+@st.cache_resource
+def get_dataset_store():
+    return DatasetStore(get_memory_budget())
+
+
+def session_id():
+    return st.session_state.setdefault('_session_id', uuid.uuid4().hex[:12])
+
+
+def session_dir():
+    """当前会话的输出目录，不同用户保存的文件不会互相覆盖"""
+    directory = os.path.join(os.environ.get(OUTPUT_DIR_ENV, 'outputs'), session_id())
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def server_path(path):
+    """用户填写的服务器文件路径，只允许本会话的输出目录或 DATA_ROOT 下的文件。
+
+    相对路径按本会话的输出目录解析；符号链接和 .. 解析后仍在允许的目录外时抛出 ValueError，
+    其他会话保存的文件不能被打开。
+    """
+    roots = [session_dir()]
+    if os.environ.get(DATA_ROOT_ENV):
+        roots.append(os.environ[DATA_ROOT_ENV])
+    resolved = os.path.realpath(os.path.join(roots[0], os.path.expanduser(path)))
+    for root in roots:
+        root = os.path.realpath(root)
+        if os.path.commonpath([root, resolved]) == root:
+            return resolved
+    raise ValueError(f"只能打开本会话保存的文件或数据目录（{DATA_ROOT_ENV}）中的文件: {path}")
+
+
+def upload_key(uploaded_file):
+    # 每次重跑都对大文件重新计算哈希也很慢，按上传记录缓存哈希值
+    hashes = st.session_state.setdefault('_upload_hashes', {})
+    upload_id = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, 'file_id', None))
+    if upload_id not in hashes:
+        hashes[upload_id] = content_hash(uploaded_file.getvalue())
+    return hashes[upload_id]
+
+
+def load_uploaded_file(uploaded_file, engine):
+    key, df = get_dataset_store().load_bytes(uploaded_file.getvalue(), uploaded_file.name,
+                                             engine=engine, key=upload_key(uploaded_file))
+    return key, df
+
+
+# 当前会话的数据处理流水线，跨重跑保留
+def get_pipeline():
+    if 'pipeline' not in st.session_state:
+        st.session_state['pipeline'] = Pipeline()
+    return st.session_state['pipeline']
+
+
+def _weak_release(pipeline):
+    # 预算只保存弱引用，不会让已结束会话的流水线一直留在内存中
+    ref = weakref.WeakMethod(pipeline.release)
+
+    def release():
+        method = ref()
+        if method is not None:
+            method()
+    return release
+
+
+def charge_pipeline(pipeline):
+    """把流水线缓存的中间结果计入全局内存预算，超出时最久未用的会话先丢弃缓存"""
+    budget = get_memory_budget()
+    key = ('session', session_id(), id(pipeline))
+    if pipeline.nbytes == 0:
+        budget.discard(key)
+        return
+    if key not in budget:
+        # 流水线被回收（会话结束或导入了新步骤）后从预算中移除
+        weakref.finalize(pipeline, budget.discard, key)
+    budget.charge(key, pipeline.nbytes, _weak_release(pipeline))
+
+
+class AppContext:
+    """一次重跑中各模块共用的数据：上传的文件、原始数据和流水线处理后的数据"""
+
+    def __init__(self, uploaded_file=None, base_key=None, base_df=None):
+        self.uploaded_file = uploaded_file
+        self.base_key = base_key
+        self.base_df = base_df
+        # 有步骤执行失败时，只使用失败之前的步骤
+        self.valid_steps = None
+        self.df = self.current_data() if base_df is not None else None
+
+    @property
+    def has_data(self):
+        return self.base_df is not None
+
+    @property
+    def version(self):
+        """当前数据版本的标识，用作各类缓存的键"""
+        return get_pipeline().fingerprint(self.base_key, self.valid_steps)
+
+    @property
+    def lineage(self):
+        return get_pipeline().lineage(self.base_key, self.valid_steps)
+
+    def current_data(self):
+        # 浅拷贝：各模块新增或替换列时不会改动共享的原始数据和缓存的结果
+        pipeline = get_pipeline()
+        try:
+            df = pipeline.run(self.base_df, self.base_key)
+            self.valid_steps = None
+        except StepError as e:
+            st.error(f"{e}。已忽略这一步及之后的步骤，请在侧边栏“处理步骤”中撤销或清空")
+            self.valid_steps = e.index
+            df = e.output
+        charge_pipeline(pipeline)
+        return df.copy(deep=False)
+
+    def apply_step(self, op, **params):
+        get_pipeline().add(op, **params)
+        self.df = self.current_data()
+        return self.df
+
+
+# 查询引擎按数据版本缓存，列的字符串形式和索引在多次查询间复用，计入全局内存预算
+@st.cache_resource
+def get_query_engines():
+    from analysis.cache import LRUCache
+    return LRUCache(4, get_memory_budget(), 'query-engines')
+
+
+def search(df, version, use_index, value, column=None, mode="fuzzy"):
+    """在数据版本 version 上查询，返回匹配行的位置"""
+    from analysis.query import QueryEngine
+    engines = get_query_engines()
+    key = (version, use_index)
+    rows = engines.get_or_create(key, lambda: QueryEngine(df, use_index=use_index)).search(value, column, mode)
+    # 列的索引在查询时才建立，引擎变大后重新计入预算
+    engines.resize(key)
+    return rows
+
+
+# 类型推断和各列的转换结果按数据版本缓存
+@st.cache_resource
+def get_type_converter():
+    from analysis.dtypes import TypeConverter
+    return TypeConverter(budget=get_memory_budget())
+
+
+# 数据概要按数据版本缓存，只修改了部分列时其余列的统计直接复用
+@st.cache_resource
+def get_profile_engine():
+    from analysis.profile import ProfileEngine
+    return ProfileEngine(budget=get_memory_budget())
+
+
+# 聚类模型按数据内容缓存，所有会话共享
+@st.cache_resource
+def get_clustering_engine():
+    from analysis.clustering import ClusteringEngine
+    return ClusteringEngine(budget=get_memory_budget())
+
+
+# 主成分分析按数据和所选列缓存，修改主成分数量时不需要重新拟合
+@st.cache_resource
+def get_decomposition_engine():
+    from analysis.decomposition import DecompositionEngine
+    return DecompositionEngine(budget=get_memory_budget())
+
+
+# 回归模型按数据和公式缓存
+@st.cache_resource
+def get_model_registry():
+    from analysis.regression import ModelRegistry
+    return ModelRegistry(budget=get_memory_budget())
+
+
+# 后台任务执行器，所有会话共用；参数相同的任务只执行一次
+@st.cache_resource
+def get_job_executor():
+    from analysis.background import JobExecutor
+    return JobExecutor(budget=get_memory_budget())
+
+
+def submit_job(slot, name, func, *args, key=None, **kwargs):
+    """在后台执行 func(job, ...)，任务编号记在当前会话的 slot 名下。
+
+    key 相同的任务已完成时直接复用结果，不会重新计算；正在执行时各会话共用同一个任务。
+    """
+    job = get_job_executor().submit(name, func, *args, key=key, subscriber=session_id(), **kwargs)
+    st.session_state.setdefault('_jobs', {})[slot] = job.id
+    return job
+
+
+def current_job(slot, key=None):
+    """slot 名下最近提交的任务；给出 key 时，参数已经改变的任务不再返回"""
+    job_id = st.session_state.get('_jobs', {}).get(slot)
+    job = get_job_executor().get(job_id) if job_id else None
+    if job is None or (key is not None and job.key != key):
+        return None
+    return job
+
+
+def _record_job(slot, job):
+    # 任务结束后第一次显示时，把任务的耗时和其中记录的各段加入本次运行的性能记录；
+    # 直接复用其他会话已完成结果的不计入
+    recorded = st.session_state.setdefault('_jobs_recorded', {})
+    if recorded.get(slot) != job.id and session_id() in job.subscribers:
+        recorded[slot] = job.id
+        attach(f"job/{job.name}", job.seconds, job.spans, status=job.status)
+
+
+def show_job(slot, job, render_partial=None, error_label="执行出错", interval=0.5, interruptible=True):
+    """显示后台任务的状态，任务成功完成时返回 True，由调用方显示结果。
+
+    运行中只有这一部分每隔 interval 秒刷新一次，显示进度和部分结果，页面其余部分不会重跑；
+    任务结束后重跑整个页面。interruptible 为 False 表示任务是一次不能中断的计算，取消后要等它算完才结束。
+    """
+    if job.status == 'error':
+        st.error(f"{error_label}: {job.error}")
+    elif job.status == 'cancelled':
+        st.warning(f"{job.name}已取消")
+    if job.finished:
+        _record_job(slot, job)
+        return job.status == 'done'
+
+    @st.fragment(run_every=interval)
+    def progress():
+        if job.finished:
+            st.rerun()
+        text = job.message or f"{job.name}进行中…"
+        if job.cancel_requested:
+            wait = "等待当前一步完成" if interruptible else "计算无法中断，完成后丢弃结果"
+            text = f"正在取消（{wait}）… {text}"
+        st.progress(job.progress, text=f"{text}（{job.seconds:.0f} 秒）")
+        if render_partial is not None and job.partial:
+            render_partial(job.partial)
+        help_text = None if interruptible else "计算一旦开始就无法中断，取消后仍要等它完成，只是不再使用结果"
+        if st.button("取消", key=f"{slot}_cancel", disabled=job.cancel_requested, help=help_text):
+            # 其他会话也在等待同一个任务时，只是本会话不再等待，任务继续执行
+            if get_job_executor().cancel(job.id, session_id()).cancel_requested:
+                st.rerun(scope='fragment')
+            st.session_state.get('_jobs', {}).pop(slot, None)
+            st.rerun()
+
+    progress()
+    return False
+
+
+def _save_job(job, df, output_file):
+    save_frame(df, output_file)
+    return output_file
+
+
+def save_data(df):
+    # 列式格式（Parquet/Feather）会保留修改后的数据类型，重新打开也更快
+    fmt = st.selectbox("保存格式", list(FORMATS))
+    if st.button("保存数据"):
+        # 在后台写入，保存大文件时页面仍可操作
+        submit_job('save', "保存数据", _save_job, df, output_path('modified_data', fmt, session_dir()))
+    job = current_job('save')
+    if job is not None and show_job('save', job, error_label="保存数据时出错"):
+        st.success(f"✅ 数据已保存为 **{job.result}**")
+
+
+# 查询结果等的行位置按 (数据版本, 查询条件, 筛选, 排序) 缓存，所有会话共享
+# 只缓存位置数组，不引用数据本身，数据被释放后缓存不会让它继续占用内存
+@st.cache_resource
+def get_result_views():
+    from analysis.cache import LRUCache
+    return LRUCache(32, get_memory_budget(), 'result-views')
+
+
+def show_result(view, key, cache_key, page_size=50):
+    """分页显示 view（ResultView），筛选和排序在服务器端进行，只把当前页发送到页面。
+
+    cache_key 标识 view 本身，例如 (数据版本, 查询方式, 列, 关键字)。
+    """
+    views = get_result_views()
+    columns = [str(column) for column in view.columns]
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+    with col1:
+        filter_column = st.selectbox("筛选列", ["不筛选"] + columns, key=f"{key}_filter_column")
+    with col2:
+        filter_value = st.text_input("筛选关键字", key=f"{key}_filter_value",
+                                     disabled=filter_column == "不筛选")
+    with col3:
+        sort_column = st.selectbox("排序列", ["不排序"] + columns, key=f"{key}_sort_column")
+    with col4:
+        descending = st.checkbox("降序", key=f"{key}_descending", disabled=sort_column == "不排序")
+
+    if filter_column != "不筛选" and filter_value:
+        column = view.columns[columns.index(filter_column)]
+        cache_key = cache_key + ('filter', filter_column, filter_value)
+        view = view.with_rows(views.get_or_create(cache_key, lambda: view.filter(column, filter_value).rows))
+    if sort_column != "不排序":
+        column = view.columns[columns.index(sort_column)]
+        cache_key = cache_key + ('sort', sort_column, descending)
+        view = view.with_rows(views.get_or_create(cache_key, lambda: view.sort(column, ascending=not descending).rows))
+
+    pages = view.pages(page_size)
+    # 筛选后页数可能变少，超出范围的页码先调整
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    col1, col2 = st.columns([3, 1])
+    with col2:
+        page = st.number_input("页码", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+    with col1:
+        st.write(f"共 {len(view)} 行，{pages} 页")
+    with span('render/table'):
+        st.dataframe(view.page(page, page_size))
+    # 完整结果在点击下载时才转换为 CSV，不随每次重跑发送到页面；Streamlit 会把生成的内容整个读入内存
+    st.download_button("下载全部结果 (CSV)", view.csv_bytes, file_name=f"{key}.csv", mime="text/csv",
+                       key=f"{key}_download")
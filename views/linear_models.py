@@ -0,0 +1,119 @@
+import streamlit as st
+
+from analysis.chunked import checked_chunks, frame_chunks
+from analysis.instrument import span
+from analysis.regression import build_formula, coef_table, forest_plot, model_stats, or_table
+from views.common import current_job, get_model_registry, show_job, submit_job
+
+
+# 大数据模式在块之间响应取消；一次性拟合无法中断，取消后要等拟合完成才丢弃结果
+def _ols_job(job, registry, df, y, xs, data_key, large_mode):
+    if large_mode:
+        return registry.streaming(checked_chunks(frame_chunks(df), job.check), 'ols', y, xs, data_key)
+    return registry.ols(df, y, xs, data_key)
+
+
+def _logit_job(job, registry, df, formula, y, xs, data_key, large_mode):
+    if large_mode:
+        return registry.streaming(checked_chunks(frame_chunks(df), job.check), 'logit', y, xs, data_key)
+    return registry.glm(df, formula, 'binomial', data_key=data_key)
+
+
+def render(ctx):
+    df = ctx.df
+    st.header('📈 线性模型')
+    st.markdown("""
+        在本模块，我们提供单/多元线性回归模型和二分类逻辑回归模型：
+        - **单/多元线性回归**：
+            线性回归是一种统计学方法，用于建立一个或多个自变量与连续型因变量之间的线性关系，
+            通过最小二乘法最小化观测值和预测值之间的差异。
+        - **二分类Logistic回归**：
+            二分类Logistic回归使用因变量为二分类(如成功/失败，是/否)的数据通过训练数据来估计模型参数，
+            并使用这些参数来预测新数据的分类结果。
+        """)
+
+    # 数据预览
+    st.subheader('数据预览')
+    st.write(df.head(10))
+    
+    model_option = st.selectbox("选择模型", ["单/多元线性回归", "二分类Logistic回归"])
+    # 大数据模式逐块累积 X'X 等统计量，内存只与自变量个数有关
+    large_mode = st.checkbox("大数据模式（分块计算，不构建完整的设计矩阵）", value=False)
+    registry = get_model_registry()
+    data_key = ctx.version
+ 
+    #单/多元线性回归
+    if model_option == "单/多元线性回归":
+        st.subheader("单/多元线性回归")
+
+        columns = df.select_dtypes(include='number').columns.tolist()
+        dependent_variable = st.multiselect("选择因变量", columns)
+        if len(dependent_variable)!=1:
+            st.info("请选择一列作为因变量")
+        independent_variable = st.multiselect("选择自变量", columns)
+
+        if independent_variable:
+            # 模型在后台拟合，切换模块后回来时直接显示已完成的结果
+            ols_key = ('ols', data_key, tuple(dependent_variable), tuple(independent_variable), large_mode)
+            #模型拟合
+            if st.button("执行单/多元线性回归"):
+                if len(dependent_variable) != 1:
+                    st.error("单/多元线性回归时出错: 请选择一列作为因变量")
+                else:
+                    submit_job('ols', "线性回归", _ols_job, registry, df, dependent_variable[0], independent_variable,
+                               data_key, large_mode, key=ols_key)
+            job = current_job('ols', ols_key)
+            if job is not None and show_job('ols', job, error_label="单/多元线性回归时出错",
+                                            interruptible=large_mode):
+                if large_mode:
+                    st.write(coef_table(job.result))
+                    st.write(model_stats(job.result))
+                else:
+                    st.write(job.result.summary())#查看回归结果
+
+    #二分类逻辑回归
+    elif model_option == "二分类Logistic回归":
+        st.subheader("二分类Logistic回归")
+
+        # 选择用于回归的列：只有数值列和布尔列能转换为浮点数，文本列需先在类型页面转换
+        columns = df.select_dtypes(include=['number', 'bool', 'boolean']).columns.tolist()
+        dependent_variable = st.multiselect("选择因变量", columns)
+        if len(dependent_variable)!=1:
+            st.info("请选择一列作为因变量")
+        independent_variable = st.multiselect("选择自变量", columns)
+
+        if independent_variable and len(dependent_variable) == 1:
+            try:
+                df[dependent_variable]=df[dependent_variable].astype('float')
+                df[independent_variable]=df[independent_variable].astype('float')
+            except (TypeError, ValueError) as e:
+                st.error(f"Logistic回归时出错: 所选列不能转换为数值 ({e})")
+                return
+            formula = build_formula(dependent_variable[0], independent_variable)
+
+            # 同一数据和公式只拟合一次，回归结果、OR值和森林图共用同一个后台任务的结果
+            logit_key = ('logit', data_key, formula, large_mode)
+            outputs = {"执行二分类Logistic回归": 'coef', "计算OR值": 'or', "绘制OR森林图": 'forest'}
+            for label, output in outputs.items():
+                if st.button(label):
+                    st.session_state['logit_output'] = output
+                    submit_job('logit', "Logistic回归", _logit_job, registry, df, formula, dependent_variable[0],
+                               independent_variable, data_key, large_mode, key=logit_key)
+            job = current_job('logit', logit_key)
+            if job is not None and show_job('logit', job, error_label="Logistic回归时出错",
+                                            interruptible=large_mode):
+                output = st.session_state.get('logit_output', 'coef')
+                try:
+                    if output == 'coef':
+                        st.write(coef_table(job.result))
+                    elif output == 'or':
+                        st.write(or_table(job.result))
+                    else:
+                        forest = forest_plot(or_table(job.result))
+                        with span('render/forest_plot'):
+                            st.pyplot(forest.draw())
+                except Exception as e:
+                    st.error(f"显示Logistic回归结果时出错: {e}")
+
+        else:
+            st.info("请选择至少一列作为自变量")
@@ -0,0 +1,124 @@
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import tracemalloc
+from collections import deque
+
+import pandas as pd
+import streamlit as st
+
+from analysis.instrument import Recorder, activate, append_log, deactivate, to_jsonl
+
+
+# 设置该环境变量为文件路径后，每次运行的记录都以 JSON Lines 格式追加到该文件
+LOG_ENV = 'PERF_LOG'
+# 面板中保留的运行次数
+HISTORY_RUNS = 50
+
+
+class PerfRun:
+    """一次脚本运行的记录，以及按需开启的 cProfile"""
+
+    def __init__(self, recorder, token, profiler=None):
+        self.recorder = recorder
+        self.token = token
+        self.profiler = profiler
+
+
+def begin(**attrs):
+    """在脚本开头调用，开始记录本次运行"""
+    capture = st.session_state.pop('_perf_capture_next', False)
+    trace_memory = st.session_state.get('perf_trace_memory', False) or capture
+    recorder = Recorder(trace_memory=trace_memory, **attrs)
+    profiler = None
+    if capture:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return PerfRun(recorder, activate(recorder), profiler)
+
+
+def _capture_report(profiler):
+    # .prof 文件可以用 snakeviz 等工具打开
+    with tempfile.NamedTemporaryFile(suffix='.prof', delete=False) as f:
+        path = f.name
+    try:
+        profiler.dump_stats(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+    finally:
+        os.remove(path)
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(60)
+    memory = ""
+    if tracemalloc.is_tracing():
+        snapshot = tracemalloc.take_snapshot()
+        memory = "\n".join(str(stat) for stat in snapshot.statistics('lineno')[:50])
+    return {'prof': data, 'stats': text.getvalue(), 'memory': memory}
+
+
+def end(run, show_panel=True):
+    """在脚本末尾调用（包括被中断时）：保存本次记录、写日志并显示性能面板。
+
+    脚本被 rerun/stop 或异常中断时 show_panel 为 False，只做清理和记录，不再绘制页面。
+    """
+    try:
+        if run.profiler is not None:
+            run.profiler.disable()
+            st.session_state['_perf_capture'] = _capture_report(run.profiler)
+    finally:
+        # tracemalloc 是进程级的，必须停止，否则所有会话此后都带着跟踪运行
+        run.recorder.finish()
+        deactivate(run.token)
+    history = st.session_state.setdefault('_perf_history', deque(maxlen=HISTORY_RUNS))
+    history.append(run.recorder)
+    log_path = os.environ.get(LOG_ENV)
+    if log_path:
+        try:
+            append_log(run.recorder.records(), log_path)
+        except OSError as e:
+            if show_panel:
+                st.sidebar.warning(f"写入性能日志失败: {e}")
+    if show_panel:
+        render_panel(history)
+
+
+def span_table(recorder):
+    """按名称汇总各段的次数、耗时和内存，保持首次出现的顺序"""
+    table = pd.DataFrame(recorder.records())
+    if table.empty:
+        return table
+    columns = {'次数': ('seconds', 'size'), '耗时(秒)': ('seconds', 'sum'), '内存变化(MB)': ('rss_delta_mb', 'sum')}
+    if 'peak_mb' in table:
+        columns['峰值内存(MB)'] = ('peak_mb', 'max')
+    grouped = table.groupby(['depth', 'name'], sort=False).agg(**columns).reset_index()
+    grouped.insert(0, '名称', ["　" * depth + name for depth, name in zip(grouped['depth'], grouped['name'])])
+    return grouped.drop(columns=['depth', 'name'])
+
+
+def render_panel(history):
+    if not st.sidebar.checkbox("⏱ 显示性能面板", key='perf_panel'):
+        return
+    with st.sidebar.expander("⏱ 性能", expanded=True):
+        last = history[-1]
+        st.write(f"本次运行耗时 {last.seconds:.3f} 秒")
+        st.dataframe(span_table(last), hide_index=True)
+
+        st.write(f"最近 {len(history)} 次运行")
+        runs = pd.DataFrame([recorder.summary() for recorder in history])
+        st.line_chart(runs['seconds'], height=150)
+        records = [record for recorder in history for record in recorder.records()]
+        st.download_button("下载运行记录 (JSONL)", to_jsonl(records), file_name="perf_log.jsonl",
+                           mime="application/json")
+
+        st.checkbox("测量峰值内存（tracemalloc，运行会变慢）", key='perf_trace_memory')
+        if st.button("分析下一次运行（cProfile + tracemalloc）"):
+            st.session_state['_perf_capture_next'] = True
+            st.rerun()
+        capture = st.session_state.get('_perf_capture')
+        if capture:
+            st.download_button("下载 cProfile 结果 (.prof)", capture['prof'], file_name="rerun.prof")
+            st.download_button("下载 cProfile 报告", capture['stats'], file_name="rerun_profile.txt")
+            if capture['memory']:
+                st.download_button("下载内存分配报告", capture['memory'], file_name="rerun_memory.txt")
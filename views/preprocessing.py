@@ -0,0 +1,51 @@
+import streamlit as st
+
+from views.common import save_data
+
+
+def render(ctx):
+    df = ctx.df
+    st.header('🛀 数据预处理')
+    st.markdown("""
+        对数据预处理可以提高数据质量，通常有以下几种方式：
+        - 1. 删除缺失值行 
+        - 2. 填充缺失值行：自定义填充
+        - 3. 删除重复行
+        - 4. 标准化数据：使其符合均值为0, 方差为1的分布
+    """)
+
+    # 数据预览
+    st.subheader('数据预览')
+    st.write(df.head(10))
+
+    #选择清理方式    
+    clean_option = st.selectbox("清洗选项", ["删除缺失值行", "填充缺失值", "删除重复行", "标准化数据"])
+    
+    # 每个操作都会记录为处理步骤，切换模块或重跑后依然生效
+    if clean_option == "删除缺失值行" and st.button("执行操作"):
+        df = ctx.apply_step('dropna')
+        st.success("已删除所有包含缺失值的行。")
+        st.write(df.head())
+
+    elif clean_option == "填充缺失值":
+        fill_column = st.selectbox("选择要填充缺失值的列", options=df.columns)
+        fill_value = st.text_input("填充值", "")
+        if st.button("执行操作") and fill_value:
+            df = ctx.apply_step('fillna', column=fill_column, value=fill_value)
+            st.success(f"已将列 `{fill_column}` 的缺失值填充为 `{fill_value}`。")
+            st.write(df.head())
+
+    elif clean_option == "删除重复行" and st.button("执行操作"):
+        df = ctx.apply_step('drop_duplicates')
+        st.success("已删除重复行")
+        st.write(df.head())
+
+    elif clean_option == "标准化数据":
+        numeric_columns = df.select_dtypes(include='floating').columns.tolist()
+        selected_columns = st.multiselect("选择需要标准化的列", numeric_columns)
+        if selected_columns and st.button("执行操作"):
+            df = ctx.apply_step('standardize', columns=selected_columns)
+            st.subheader('📝 预览标准化后的数据')
+            st.write(df.head())
+
+    save_data(df)
@@ -0,0 +1,39 @@
+import streamlit as st
+
+from analysis.paging import ResultView
+from views.common import search, show_result
+
+
+def render(ctx):
+    df = ctx.df
+    st.header('🔍 数据查询')
+    st.markdown("""
+        你可以通过以下方式对数据进行查询：
+        - **模糊查询**：通过输入部分关键字进行搜索。
+        - **精确查询**：查询完全匹配的值。
+    """)
+
+    query_option = st.selectbox("选择查询方式", ["模糊查询", "精确查询"])
+
+    # 增加一个"全部"选项用于查询所有列
+    query_column = st.selectbox("选择查询的列", options=["全部"] + list(df.columns))
+
+    # 索引在第一次查询时建立，之后的查询直接使用
+    use_index = st.checkbox("建立索引加速重复查询", value=False)
+    column = None if query_column == "全部" else query_column
+
+    if query_option == "模糊查询":
+        query_value = st.text_input(f"请输入模糊查询的关键字（列：{query_column})")
+        if query_value:
+            # 结果只保存匹配行的位置，不复制数据
+            rows = search(df, ctx.version, use_index, query_value, column=column, mode="fuzzy")
+            st.subheader(f"查询结果：")
+            show_result(ResultView(df, rows), "query", (ctx.version, "fuzzy", query_column, query_value))
+
+    elif query_option == "精确查询":
+        query_value = st.text_input(f"请输入精确查询的值（列：{query_column})")
+        if query_value:
+            # 结果只保存匹配行的位置，不复制数据
+            rows = search(df, ctx.version, use_index, query_value, column=column, mode="exact")
+            st.subheader(f"查询结果：")
+            show_result(ResultView(df, rows), "query", (ctx.version, "exact", query_column, query_value))
@@ -0,0 +1,94 @@
+import pandas as pd
+import streamlit as st
+
+from analysis.dtypes import DTYPE_OPTIONS, convert_frame, needs_conversion
+from analysis.profile import profile_table
+from views.common import get_profile_engine, get_type_converter, save_data
+
+
+def render(ctx):
+    # 自动推断数据类型
+    df = ctx.df.infer_objects()
+
+    # 数据预览
+    st.subheader('👀 数据预览')
+    st.write("这里是上传的数据预览：")
+    st.write(df.head(10))
+
+    # 数据整体描述：各列的统计量只计算一次，按数据版本缓存
+    st.subheader('📋 数据概述')
+    profiles = get_profile_engine().profile(df, ctx.lineage)
+    profile = profile_table(profiles)
+    st.write("### 数据描述统计")
+    numeric_columns = [column for column, p in profiles.items() if p.numeric]
+    st.dataframe(profile.loc[numeric_columns, ['非空值', '均值', '标准差', '最小值', '25%', '50%', '75%', '最大值']])
+    st.write("### 数据类型与缺失值信息")
+    memory = profile['内存(KB)'].sum() / 1024 if len(profile) else 0.0
+    st.write(f"共 {len(df)} 行，{len(df.columns)} 列，内存占用 {memory:.1f} MB")
+    st.dataframe(profile[['类型', '非空值', '缺失值', '缺失比例', '不同值(约)', '内存(KB)']])
+
+    # 显示推断的数据类型    
+    st.subheader('📑 推断的数据类型')
+    st.write("自动推断的数据类型如下：")
+    st.dataframe(df.dtypes.to_frame().style.background_gradient(axis=0, cmap='coolwarm'))
+
+    # 数据类型确认和修改
+    st.header('🔧 数据类型确认与修改')
+    st.markdown("""
+        请查看每一列的数据类型。如果机器的推断不准确，您可以手动修改数据类型。
+        例如，如果某列应该是日期，但被识别为字符串，您可以选择将其转换为时间数据类型。
+    """)
+
+    # 类型推断只看抽样的行，结果按数据版本缓存
+    converter = get_type_converter()
+    inferred = converter.infer(df, ctx.version)
+    # 所有列放在一个表格中修改，不再为每一列生成一个下拉框
+    table = pd.DataFrame({
+        '列名': [str(column) for column in df.columns],
+        '当前类型': df.dtypes.astype(str).tolist(),
+        '推断类型': list(inferred.values()),
+        '目标类型': list(inferred.values()),
+    })
+    edited = st.data_editor(
+        table,
+        column_config={'目标类型': st.column_config.SelectboxColumn("目标类型", options=DTYPE_OPTIONS, required=True)},
+        disabled=['列名', '当前类型', '推断类型'],
+        hide_index=True,
+        key=f"dtype_editor_{ctx.version}",
+    )
+
+    # 只有类型发生变化或可以压缩的列需要转换；整列的转换推迟到点击“应用类型修改”时执行，
+    # 这里只转换预览的几行
+    targets = dict(zip(df.columns, edited['目标类型']))
+    changed_dtypes = {column: dtype for column, dtype in targets.items() if needs_conversion(df[column], dtype)}
+    try:
+        preview = convert_frame(df.head(10), changed_dtypes)
+    except Exception as e:
+        st.error(f"转换数据类型时出错: {e}")
+        preview = df.head(10)
+        changed_dtypes = {}
+
+    # 显示将要修改的数据类型
+    st.subheader('📝 修改后的数据类型')
+    if changed_dtypes:
+        st.write("应用后以下各列的数据类型将被修改：")
+        st.dataframe(pd.DataFrame({'当前类型': df[list(changed_dtypes)].dtypes.astype(str),
+                                   '目标类型': pd.Series(changed_dtypes)}))
+    else:
+        st.write("没有需要修改的数据类型")
+
+    # 显示修改后的数据预览
+    st.subheader('🔄 修改后的数据预览')
+    col1, col2 = st.columns([3, 1])  # 使用 3:1 的比例
+    with col1:
+        st.write(preview)
+    with col2:
+        st.write(f"数据的总行数: {len(df)}")
+        st.write(f"当前内存占用: {memory:.1f} MB，应用修改后在数据概述中查看新的内存占用")
+
+    # 把类型修改记录为处理步骤，后续模块都使用修改后的数据
+    if changed_dtypes and st.button("应用类型修改"):
+        ctx.apply_step('convert_types', dtypes=changed_dtypes)
+        st.rerun()
+
+    save_data(df)
@@ -0,0 +1,135 @@
+import streamlit as st
+
+from analysis.charts import elbow_figure, pca_scatter_figure, scree_figure
+from analysis.clustering import METRICS, describe_clusters
+from analysis.decomposition import PLOT_ROWS, max_components
+from analysis.paging import ResultView
+from views.common import current_job, get_clustering_engine, get_decomposition_engine, show_job, show_result, submit_job
+
+
+ELBOW_KS = range(1, 11)
+
+
+def _elbow_job(job, engine, df, columns, metric, data_key):
+    sse = {}
+
+    def on_result(k, inertia):
+        sse[k] = inertia
+        job.report(len(sse) / len(ELBOW_KS), f"已完成 {len(sse)}/{len(ELBOW_KS)} 个簇数", sse=dict(sorted(sse.items())))
+    return engine.elbow(df, columns, ELBOW_KS, metric, data_key=data_key, on_result=on_result)
+
+
+def _cluster_job(job, engine, df, columns, k, metric, data_key):
+    job.report(message=f"正在拟合 {k} 个簇")
+    return engine.fit(df, columns, k, metric, data_key=data_key)
+
+
+def render(ctx):
+    df = ctx.df
+    st.header('🍪 无监督学习')
+    st.markdown("""
+        无监督学习是机器学习中的一种方法，与监督学习相对。
+        在无监督学习中，训练数据只包含输入数据而不包含标签，目的是从数据中发现模式或结构，而不是对数据进行预测。
+        - **K-means聚类分析**：
+            K-means聚类的核心思想是将数据点划分为K个簇，使得簇内的数据点尽可能相似，而簇间的数据点尽可能不同。
+            这个过程通过迭代地移动簇中心和重新分配数据点到最近的簇中心来实现，直到簇的分配不再发生变化或达到预设的迭代次数
+        - **主成分分析(PCA)**：
+            主成分分析（PCA）是一种降维技术，它通过正交变换将一组可能相关的变量转换成一组线性不相关的变量，称为主成分。
+            其核心思想是识别数据中的主要变化方向，并在这些方向上捕捉数据的大部分信息，从而用较少的维度来表示原始数据集。
+    """)
+    # 数据预览
+    st.subheader('数据预览')
+    st.write(df.head(10))
+
+    learning_option = st.selectbox("选择模型", ["K-means聚类分析", "主成分分析"])
+
+    if learning_option == "K-means聚类分析":
+        st.subheader("K-means聚类分析")
+    
+        # 获取数值型的列供用户选择
+        numeric_columns = df.select_dtypes(include='number').columns.tolist()
+        selected_columns = st.multiselect("选择用于聚类的列", numeric_columns)
+        n_clusters = st.number_input("选择簇数", min_value=2, max_value=10, value=3, step=1)
+
+        # 距离度量选择：曼哈顿距离使用 K-medians（簇中心取中位数）
+        distance_metric = st.selectbox("选择距离度量", METRICS)
+
+        # 肘部图和聚类共用同一份模型缓存，肘部图中已拟合的簇数执行聚类时无需重新拟合
+        engine = get_clustering_engine()
+        data_key = ctx.version
+        # 肘部图在后台逐个簇数拟合，页面上随时显示已完成的点，可以取消
+        elbow_key = ('elbow', data_key, tuple(selected_columns), distance_metric)
+        if st.button("显示肘部图") and selected_columns:
+            submit_job('elbow', "肘部图计算", _elbow_job, engine, df, selected_columns, distance_metric, data_key,
+                       key=elbow_key)
+        job = current_job('elbow', elbow_key)
+        if job is not None:
+            def partial_elbow(partial):
+                st.write(elbow_figure(partial['sse'], distance_metric))
+            if show_job('elbow', job, partial_elbow, error_label="计算肘部图时出错"):
+                st.write(elbow_figure(job.result, distance_metric))
+
+        # 记住执行过的聚类任务：分页、筛选结果或切换模块后回来时，直接显示已完成的结果
+        params = (data_key, tuple(selected_columns), n_clusters, distance_metric)
+        if st.button("执行聚类") and selected_columns:
+            submit_job('cluster', "聚类", _cluster_job, engine, df, selected_columns, n_clusters, distance_metric,
+                       data_key, key=('cluster',) + params)
+        job = current_job('cluster', ('cluster',) + params)
+        # 一次聚类拟合无法中断
+        if selected_columns and job is not None \
+                and show_job('cluster', job, error_label="聚类时出错", interruptible=False):
+            try:
+                result = job.result
+                df['Cluster'] = result.labels
+                st.caption(f"使用算法：{result.method}")
+
+                # 存储聚类结果：分页显示，完整结果可以下载
+                show_result(ResultView(df, columns=['Cluster'] + selected_columns), "clusters", ('clusters',) + params)
+
+                # 存储簇的描述性统计
+                cluster_description = describe_clusters(df, selected_columns, result.labels)
+                st.write(cluster_description)
+            except Exception as e:
+                st.error(f"聚类时出错: {e}")
+
+    elif learning_option == "主成分分析":
+        st.subheader("主成分分析(PCA)")
+
+        # 选择数值列用于主成分分析
+        numeric_columns = df.select_dtypes(include='number').columns.tolist()
+        selected_columns = st.multiselect("选择用于主成分分析的列", numeric_columns)
+
+        if selected_columns:
+            limit = max_components(len(df), len(selected_columns))
+            n_components = st.number_input("选择主成分数量", min_value=1, max_value=limit, value=min(2, limit), step=1)
+            engine = get_decomposition_engine()
+            data_key = ctx.version
+            if st.button("执行PCA"):
+                try:
+                    # 一次拟合全部主成分，之后任意主成分数量都从缓存结果中截取
+                    decomposition = engine.fit(df, selected_columns, data_key=data_key)
+                    st.caption(f"使用方法：{decomposition.method}")
+
+                    # 保存PCA结果
+                    pca_df = decomposition.transform(df[selected_columns].head(), n_components)
+                    st.write(pca_df)
+
+                    # 显示方差贡献率
+                    st.write("各主成分的方差贡献率：")
+                    st.write(decomposition.variance_table(n_components))
+
+                    # 如果有两个或更多主成分，绘制散点图（最多抽取 PLOT_ROWS 行）
+                    if n_components >= 2:
+                        plot_df = engine.project(df, selected_columns, 2, data_key=data_key, rows=PLOT_ROWS)
+                        st.write(pca_scatter_figure(plot_df))
+                except Exception as e:
+                    st.error(f"主成分分析时出错: {e}")
+
+            if st.button("显示碎石图"):
+                try:
+                    scree = engine.fit(df, selected_columns, data_key=data_key).scree()
+                    st.write(scree_figure(scree))
+                except Exception as e:
+                    st.error(f"绘制碎石图时出错: {e}")
+        else:
+            st.info("请选择至少一列用于主成分分析")
@@ -0,0 +1,63 @@
+import os
+
+import streamlit as st
+
+from analysis.charts import LINE_METHODS, PLOT_TYPES, build_figure
+from analysis.instrument import span
+from views.common import current_job, session_dir, show_job, submit_job
+
+
+def _write_image_job(job, fig, output_figure):
+    fig.write_image(output_figure)
+    return output_figure
+
+
+def render(ctx):
+    df = ctx.df
+    st.header('📊 数据可视化')
+    st.markdown("""
+        不同的图表类型帮助我们进行数据探索和结果展示：
+        - **散点图**：适合展示两个连续变量之间的关系
+        - **折线图**：适合展示数据随时间变化的趋势
+        - **饼图**：适合展示各部分占总体的比例关系，但当类别过多时，饼图会变得难以阅读
+        - **箱线图**：箱线图展示了数据的中位数、四分位数和异常值，可以直观地看出数据的分布和离散程度；适用于比较不同组数据的分布情况，识别异常值。
+
+        数据量较大时，折线图会先降采样，散点图改用 WebGL 绘制或在服务端聚合为密度图，
+        饼图和箱线图只发送统计结果，避免页面卡顿。
+    """)
+    # 数据预览
+    st.subheader('数据预览')
+    st.write(df.head(10))
+
+    plot_type = st.selectbox("选择图表类型", PLOT_TYPES)
+    x_axis = st.selectbox("选择X轴", df.columns)
+    y_axis = st.selectbox("选择Y轴", df.columns)
+    hue = st.selectbox("颜色分类（可选）", [None] + list(df.columns))
+    line_method = LINE_METHODS[0]
+    if plot_type == "折线图":
+        line_method = st.selectbox("折线降采样方法", LINE_METHODS)
+
+    st.header('📃生成图表')
+    # 生成的图表保存在会话中，点击保存等按钮引起重跑时不需要重新生成
+    params = (ctx.version, plot_type, x_axis, y_axis, hue, line_method)
+    if st.button("生成图表"):
+        try:
+            fig, info = build_figure(df, plot_type, x_axis, y_axis, hue, line_method=line_method)
+            st.session_state['chart'] = (params, fig, info)
+        except Exception as e:
+            st.session_state.pop('chart', None)
+            st.error(f"生成图表时出错: {e}")
+    chart = st.session_state.get('chart')
+    if chart is not None and chart[0] == params:
+        _, fig, info = chart
+        with span('render/chart'):
+            st.write(fig)
+        st.caption(f"原始 {info['rows']} 行，发送 {info['points']} 个点（{info['mode']}），"
+                   f"图表数据 {info['payload_bytes'] / 1024:.1f} KB，生成耗时 {info['seconds']:.2f} 秒")
+    
+        #保存图表：导出图片较慢，在后台进行
+        if st.button("保存图表"):
+            submit_job('figure', "保存图表", _write_image_job, fig, os.path.join(session_dir(), 'output_figure.png'))
+        job = current_job('figure')
+        if job is not None and show_job('figure', job, error_label="保存图表时出错"):
+            st.success(f"✅ 图表已保存为 **{job.result}**")